@@ -1,11 +1,12 @@
 from django.contrib import admin
-from .models import Turf, PitchType, GameTime, Purpose, Facility, TurfImage, WhatsappNumber, CallNumber
+from .models import Turf, PitchType, GameTime, Purpose, Facility, TurfImage, WhatsappNumber, CallNumber, OpeningHours, Booking
 from django import forms
 from django.utils.safestring import mark_safe
 from django.conf import settings
-from PIL import Image
-from io import BytesIO
-from django.core.files.uploadedfile import InMemoryUploadedFile
+from cloudinary import CloudinaryResource
+from .images import process_photo
+from .numbers import InvalidNumber, normalize_numbers, split_numbers, sync_numbers
+from .schedule import validate_game_time
 
 
 class TurfImageAdminForm(forms.ModelForm):
@@ -16,66 +17,44 @@ class TurfImageAdminForm(forms.ModelForm):
             "image": "Images are optimized automatically on delivery",
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Optional on the model only so API uploads can wait in the processing queue
+        self.fields["image"].required = True
+
     def clean_image(self):
         img_file = self.cleaned_data.get("image")
-        if not img_file:
+        if not img_file or isinstance(img_file, CloudinaryResource):
+            # Nothing new uploaded
             return img_file
         try:
-            try:
-                img_file.seek(0)
-            except Exception:
-                pass
-            img = Image.open(img_file)
-            img_format = (img.format or 'JPEG').upper()
-            if img_format not in ("JPEG", "JPG", "PNG", "WEBP"):
-                img_format = "JPEG"
-            if img.mode in ("RGBA", "P") and img_format in ("JPEG", "JPG"):
-                img = img.convert("RGB")
-            # Resize to reasonable width for admin uploads
-            max_width = 2000
-            w, h = img.size
-            if w > max_width:
-                ratio = max_width / float(w)
-                img = img.resize((int(w * ratio), int(h * ratio)), Image.LANCZOS)
-            # Compress to fit under ~10MB
-            max_bytes = 10 * 1024 * 1024
-            quality = 85
-            min_quality = 60
-            buf = BytesIO()
-            img.save(buf, format="JPEG" if img_format in ("JPEG", "JPG") else img_format, optimize=True, quality=quality)
-            while buf.tell() > max_bytes and quality > min_quality:
-                quality -= 5
-                buf.seek(0)
-                buf.truncate()
-                img.save(buf, format="JPEG" if img_format in ("JPEG", "JPG") else img_format, optimize=True, quality=quality)
-            buf.seek(0)
-            filename = getattr(img_file, 'name', f'upload.{img_format.lower()}')
-            content_type = 'image/jpeg' if img_format in ("JPEG", "JPG") else f'image/{img_format.lower()}'
-            return InMemoryUploadedFile(
-                buf,
-                field_name=None,
-                name=filename,
-                content_type=content_type,
-                size=buf.getbuffer().nbytes,
-                charset=None
-            )
+            optimized, info = process_photo(img_file)
         except Exception:
             # If compression fails, return original to avoid blocking admin
-            return img_file
+            optimized = img_file
+            info = {"width": None, "height": None, "bytes": None, "dominant_color": "", "placeholder": ""}
+        # Not form fields, so set them on the instance directly
+        for field, value in info.items():
+            setattr(self.instance, field, value)
+        return optimized
+
+
+class OpeningHoursInline(admin.TabularInline):
+    # Parsed from game_time on save; shown so the parse can be checked
+    model = OpeningHours
+    extra = 0
+    can_delete = False
+    readonly_fields = ("weekday", "opens_at", "closes_at")
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 class TurfImageInline(admin.StackedInline):  # use StackedInline to show help_text
     model = TurfImage
     extra = 1
     form = TurfImageAdminForm
-
-
-def _split_numbers(raw: str):
-    if not raw:
-        return []
-    # split by comma or newline and strip
-    parts = [p.strip() for p in raw.replace("\r", "").replace(",", "\n").split("\n")]
-    return [p for p in parts if p]
+    readonly_fields = ("status",)
 
 
 class TurfAdminForm(forms.ModelForm):
@@ -107,11 +86,28 @@ class TurfAdminForm(forms.ModelForm):
                 instance.call_numbers.values_list("number", flat=True)
             )
 
+    def _clean_numbers(self, field):
+        try:
+            return normalize_numbers(split_numbers(self.cleaned_data.get(field, "")))
+        except InvalidNumber as exc:
+            raise forms.ValidationError(str(exc))
+
+    def clean_game_time(self):
+        game_time = self.cleaned_data.get("game_time")
+        validate_game_time(game_time)
+        return game_time
+
+    def clean_whatsapp_numbers_text(self):
+        return self._clean_numbers("whatsapp_numbers_text")
+
+    def clean_call_numbers_text(self):
+        return self._clean_numbers("call_numbers_text")
+
 @admin.register(Turf)
 class TurfAdmin(admin.ModelAdmin):
     form = TurfAdminForm
     list_display = ("name", "pitch_type", "price_per_hour", "location", "latitude", "longitude", "created_at")
-    inlines = [TurfImageInline]
+    inlines = [OpeningHoursInline, TurfImageInline]
     exclude = ("whatsapp_numbers", "call_numbers")
 
     readonly_fields = ("location_map",)
@@ -171,16 +167,9 @@ class TurfAdmin(admin.ModelAdmin):
 
     def save_model(self, request, obj, form, change):
         super().save_model(request, obj, form, change)
-        # Save WhatsApp numbers
-        wa_numbers = [_ for _ in _split_numbers(form.cleaned_data.get("whatsapp_numbers_text", ""))]
-        if wa_numbers is not None:
-            wa_objs = [WhatsappNumber.objects.get_or_create(number=n)[0] for n in wa_numbers]
-            obj.whatsapp_numbers.set(wa_objs)
-        # Save Call numbers
-        call_numbers = [_ for _ in _split_numbers(form.cleaned_data.get("call_numbers_text", ""))]
-        if call_numbers is not None:
-            call_objs = [CallNumber.objects.get_or_create(number=n)[0] for n in call_numbers]
-            obj.call_numbers.set(call_objs)
+        # Cleaned to lists of normalized numbers by TurfAdminForm
+        sync_numbers(obj, "whatsapp_numbers", form.cleaned_data.get("whatsapp_numbers_text", []))
+        sync_numbers(obj, "call_numbers", form.cleaned_data.get("call_numbers_text", []))
 
 
 @admin.register(PitchType)
@@ -210,3 +199,20 @@ class WhatsappNumberAdmin(admin.ModelAdmin):
 @admin.register(CallNumber)
 class CallNumberAdmin(admin.ModelAdmin):
     list_display = ("number",)
+
+
+@admin.register(Booking)
+class BookingAdmin(admin.ModelAdmin):
+    list_display = ("turf", "starts_at", "ends_at", "customer_name", "customer_phone", "price", "status")
+    list_filter = ("status",)
+    list_select_related = ("turf",)
+    search_fields = ("reference", "customer_name", "customer_phone")
+    date_hierarchy = "starts_at"
+    # Bookings are made through the API (turf.booking.create_booking), which
+    # checks opening hours and overlaps; here they can only be cancelled
+    readonly_fields = (
+        "reference", "turf", "starts_at", "ends_at", "customer_name", "customer_phone", "price", "created_at",
+    )
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,126 @@
+"""
+Slot availability and booking.
+
+Availability is interval arithmetic over aware datetimes: the turf's
+OpeningHours for the requested days (intervals ending at midnight are
+joined to the next day's), minus its confirmed bookings, cut into slots of
+TURF_SLOT_MINUTES on a grid starting at local midnight.
+
+create_booking serializes writers per turf by locking the Turf row, so two
+requests for the same slot cannot both pass the overlap check; the
+booking_no_overlap exclusion constraint backs this up in the database.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Booking, OpeningHours, Turf
+
+SLOT_MINUTES = getattr(settings, "TURF_SLOT_MINUTES", 60)
+
+
+class SlotUnavailable(Exception):
+    pass
+
+
+def _at(day, minutes):
+    return timezone.make_aware(datetime.combine(day, time.min) + timedelta(minutes=minutes))
+
+
+def open_intervals(turf_id, start, end):
+    """Merged (opens, closes) intervals within [start, end) during which the turf is open."""
+    hours = {}
+    for weekday, opens, closes in OpeningHours.objects.filter(turf_id=turf_id).values_list(
+        "weekday", "opens_at", "closes_at"
+    ):
+        hours.setdefault(weekday, []).append((opens, closes))
+    intervals = []
+    day, last = timezone.localtime(start).date(), timezone.localtime(end).date()
+    while day <= last:
+        for opens, closes in sorted(hours.get(day.weekday(), ())):
+            opens, closes = max(_at(day, opens), start), min(_at(day, closes), end)
+            if opens >= closes:
+                continue
+            if intervals and opens <= intervals[-1][1]:
+                intervals[-1] = (intervals[-1][0], max(intervals[-1][1], closes))
+            else:
+                intervals.append((opens, closes))
+        day += timedelta(days=1)
+    return intervals
+
+
+def subtract(intervals, busy):
+    """`intervals` minus `busy`; both sorted lists of (start, end)."""
+    free = []
+    for start, end in intervals:
+        for busy_start, busy_end in busy:
+            if busy_end <= start or busy_start >= end:
+                continue
+            if busy_start > start:
+                free.append((start, busy_start))
+            start = max(start, busy_end)
+        if start < end:
+            free.append((start, end))
+    return free
+
+
+def on_grid(moment):
+    """Whether `moment` is a slot boundary."""
+    local = timezone.localtime(moment)
+    return local.second == 0 and local.microsecond == 0 and (local.hour * 60 + local.minute) % SLOT_MINUTES == 0
+
+
+def split_slots(intervals):
+    """The SLOT_MINUTES slots on the grid that fit inside `intervals`."""
+    step = timedelta(minutes=SLOT_MINUTES)
+    slots = []
+    for start, end in intervals:
+        local = timezone.localtime(start)
+        offset = (local.hour * 60 + local.minute) % SLOT_MINUTES
+        if offset or local.second or local.microsecond:
+            start += timedelta(minutes=SLOT_MINUTES - offset, seconds=-local.second, microseconds=-local.microsecond)
+        while start + step <= end:
+            slots.append((start, start + step))
+            start += step
+    return slots
+
+
+def availability(turf_id, start, end):
+    """Free [(starts_at, ends_at)] slots of a turf between `start` and `end`, from now on."""
+    start = max(start, timezone.now())
+    if start >= end:
+        return []
+    busy = Booking.objects.confirmed().filter(turf_id=turf_id).overlapping(start, end).values_list(
+        "starts_at", "ends_at"
+    )
+    return split_slots(subtract(open_intervals(turf_id, start, end), list(busy)))
+
+
+def create_booking(turf_id, starts_at, ends_at, **customer):
+    """
+    Book [starts_at, ends_at) on a turf. Raises Turf.DoesNotExist, or
+    SlotUnavailable if the turf is closed for part of it or it overlaps a
+    confirmed booking.
+    """
+    with transaction.atomic():
+        # Every booking of this turf waits here until the previous one commits
+        turf = Turf.objects.select_for_update().only("pk", "price_per_hour").get(pk=turf_id)
+        if open_intervals(turf.pk, starts_at, ends_at) != [(starts_at, ends_at)]:
+            raise SlotUnavailable("The turf is not open for the whole booking.")
+        if Booking.objects.confirmed().filter(turf=turf).overlapping(starts_at, ends_at).exists():
+            raise SlotUnavailable("The slot is already booked.")
+        minutes = (ends_at - starts_at).total_seconds() / 60
+        try:
+            with transaction.atomic():
+                return Booking.objects.create(
+                    turf=turf,
+                    starts_at=starts_at,
+                    ends_at=ends_at,
+                    price=round(turf.price_per_hour * minutes / 60),
+                    **customer,
+                )
+        except IntegrityError:
+            # Lost a race the lock did not cover, caught by booking_no_overlap
+            raise SlotUnavailable("The slot is already booked.")
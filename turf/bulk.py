@@ -0,0 +1,252 @@
+"""
+Set-based writes for loading many turfs at once (import_turfs, bulk API).
+
+These bypass model signals, so callers finish with `refresh_derived_data`,
+which does in a few statements what the signals would have done per row.
+"""
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_version
+from .geo import location_index
+from .models import Turf
+from .numbers import normalize_numbers, resolve_numbers
+from .schedule import parse_schedule, sync_opening_hours
+from .suggest import suggest_index
+from .summary import refresh_summaries
+
+logger = logging.getLogger(__name__)
+
+
+# Columns of an import/export file. Multi-valued columns are lists in JSONL
+# and MULTI_VALUE_SEPARATOR-joined strings in CSV.
+SCALAR_COLUMNS = (
+    "id", "external_id", "name", "pitch_description", "pitch_type", "price_per_hour", "game_time",
+    "location", "map_link", "latitude", "longitude",
+)
+M2M_COLUMNS = ("purposes", "facilities", "whatsapp_numbers", "call_numbers")
+COLUMNS = SCALAR_COLUMNS + M2M_COLUMNS
+MULTI_VALUE_SEPARATOR = ";"
+
+
+def _text(value):
+    value = "" if value is None else str(value).strip()
+    return value or None
+
+
+def _values(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(MULTI_VALUE_SEPARATOR)
+    # Keep order, drop blanks and duplicates
+    return list(dict.fromkeys(v for v in (_text(v) for v in value) if v))
+
+
+def _float(row, column):
+    value = _text(row.get(column))
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        raise ValueError(f"{column} must be a number, got {value!r}")
+
+
+def parse_row(row):
+    """
+    Validate one import row (a dict of COLUMNS). Returns a cleaned dict, with
+    phone numbers in E.164 form, or raises ValueError. A row names its turf
+    by external_id, or by id when it has none. Columns that are absent are
+    imported as empty.
+    """
+    parsed = {column: _text(row.get(column)) for column in SCALAR_COLUMNS}
+    parsed.update({column: _values(row.get(column)) for column in M2M_COLUMNS})
+    if not parsed["external_id"] and not parsed["id"]:
+        raise ValueError("external_id or id is required")
+    if not parsed["name"]:
+        raise ValueError("name is required")
+    if parsed["id"] is not None:
+        try:
+            parsed["id"] = int(parsed["id"])
+        except ValueError:
+            raise ValueError(f"id must be a whole number, got {parsed['id']!r}")
+    try:
+        parsed["price_per_hour"] = int(float(parsed["price_per_hour"]))
+    except (TypeError, ValueError):
+        raise ValueError(f"price_per_hour must be a whole number, got {parsed['price_per_hour']!r}")
+    for column in ("whatsapp_numbers", "call_numbers"):
+        parsed[column] = normalize_numbers(parsed[column])
+    # Opening hours are parsed from game_time; raises ScheduleError (a ValueError)
+    parse_schedule(parsed["game_time"])
+    parsed["latitude"] = _float(row, "latitude")
+    parsed["longitude"] = _float(row, "longitude")
+    return parsed
+
+
+def turf_row(turf):
+    """Export row for a turf loaded with pitch_type and the M2M relations prefetched."""
+    row = {column: getattr(turf, column) for column in SCALAR_COLUMNS if column != "pitch_type"}
+    row["pitch_type"] = turf.pitch_type.name if turf.pitch_type else None
+    for column in ("purposes", "facilities"):
+        row[column] = [item.name for item in getattr(turf, column).all()]
+    for column in ("whatsapp_numbers", "call_numbers"):
+        row[column] = [item.number for item in getattr(turf, column).all()]
+    return row
+
+
+class LookupCache:
+    """
+    Value -> id map for a lookup model (PitchType, Purpose, ...), loaded
+    once and extended with one bulk insert per batch of unseen values.
+    """
+
+    def __init__(self, model, field="name"):
+        self.model = model
+        self.field = field
+        self._ids = None
+        self.created = 0
+
+    def _load(self):
+        if self._ids is None:
+            self._ids = dict(self.model.objects.values_list(self.field, "id"))
+
+    def resolve(self, values):
+        """Return {value: id} for `values`, creating the rows that are missing."""
+        self._load()
+        missing = {value for value in values if value and value not in self._ids}
+        if missing:
+            self.model.objects.bulk_create(
+                [self.model(**{self.field: value}) for value in missing], ignore_conflicts=True
+            )
+            # ignore_conflicts leaves ids unset (and another writer may have
+            # won the race), so read them back
+            found = dict(self.model.objects.filter(**{f"{self.field}__in": missing}).values_list(self.field, "id"))
+            self.created += len(found)
+            self._ids.update(found)
+        return {value: self._ids[value] for value in values if value in self._ids}
+
+    def get(self, value):
+        return self.resolve([value]).get(value)
+
+
+def sync_m2m(field_name, wanted):
+    """
+    Make Turf.<field_name> hold exactly wanted[turf_id] (a set of ids) for
+    every turf in `wanted`: one read of the through table, one delete and
+    one bulk insert. Returns (added, removed).
+    """
+    field = Turf._meta.get_field(field_name)
+    through = field.remote_field.through
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    existing = {}
+    for pk, turf_id, target_id in through.objects.filter(**{f"{source}__in": list(wanted)}).values_list(
+        "pk", f"{source}_id", f"{target}_id"
+    ):
+        existing.setdefault(turf_id, {})[target_id] = pk
+
+    stale = []
+    new = []
+    for turf_id, target_ids in wanted.items():
+        current = existing.get(turf_id, {})
+        stale.extend(pk for target_id, pk in current.items() if target_id not in target_ids)
+        new.extend(
+            through(**{f"{source}_id": turf_id, f"{target}_id": target_id})
+            for target_id in target_ids if target_id not in current
+        )
+    if stale:
+        through.objects.filter(pk__in=stale).delete()
+    if new:
+        through.objects.bulk_create(new, ignore_conflicts=True)
+    return len(new), len(stale)
+
+
+def refresh_derived_data(turf_ids=None):
+    """
+    Rebuild search documents, summary rows and opening hours, and
+    invalidate cached responses and in-memory indexes, after bulk writes
+    (all turfs when turf_ids is None). Returns {turf id: error} for turfs
+    whose game_time could not be parsed into opening hours.
+    """
+    turfs = Turf.objects.all() if turf_ids is None else Turf.objects.filter(pk__in=turf_ids)
+    turfs.update_search_vectors()
+    refresh_summaries(turf_ids)
+    errors = sync_opening_hours(turf_ids)
+    for pk, error in errors.items():
+        logger.warning("Turf %s has no opening hours: %s", pk, error)
+
+    def invalidate():
+        bump_version("turfs", "lookups", "pitchtypes", "purposes", "facilities")
+        # Other workers pick the changes up on their next TTL reload
+        location_index.invalidate()
+        suggest_index.invalidate()
+    transaction.on_commit(invalidate)
+    return errors
+
+
+# Turf columns a bulk API item can set directly
+BULK_FIELDS = (
+    "external_id", "name", "pitch_description", "price_per_hour", "game_time",
+    "location", "latitude", "longitude", "map_link",
+)
+
+
+def _apply(turf, item):
+    for field in BULK_FIELDS:
+        if field in item:
+            setattr(turf, field, item[field])
+    if "pitch_type" in item:
+        turf.pitch_type_id = item["pitch_type"]
+
+
+def _write_relations(turfs, items):
+    # Relations are replaced only for the items that include them
+    for field in ("purposes", "facilities"):
+        wanted = {turf.pk: set(item[field]) for turf, item in zip(turfs, items) if field in item}
+        if wanted:
+            sync_m2m(field, wanted)
+    for field in ("whatsapp_numbers", "call_numbers"):
+        given = [(turf, item[f"{field}_input"]) for turf, item in zip(turfs, items) if f"{field}_input" in item]
+        if given:
+            model = Turf._meta.get_field(field).related_model
+            ids = resolve_numbers(model, list({number for _, numbers in given for number in numbers}))
+            sync_m2m(field, {turf.pk: {ids[number] for number in numbers} for turf, numbers in given})
+
+
+def bulk_create_turfs(items):
+    """Create turfs from validated bulk items (see serializers.validate_bulk) in one transaction."""
+    with transaction.atomic():
+        turfs = []
+        for item in items:
+            turf = Turf()
+            _apply(turf, item)
+            turfs.append(turf)
+        Turf.objects.bulk_create(turfs)
+        _write_relations(turfs, items)
+        refresh_derived_data([turf.pk for turf in turfs])
+    return turfs
+
+
+def bulk_update_turfs(items):
+    """
+    Apply validated partial bulk items, each naming its turf by "id", in one
+    transaction. Only the fields present in an item change.
+    """
+    with transaction.atomic():
+        # Locked so writes between loading and bulk_update are not lost
+        by_id = Turf.objects.select_for_update().defer("search_vector").in_bulk([item["id"] for item in items])
+        turfs = [by_id[item["id"]] for item in items]
+        fields = {"updated_at"}
+        now = timezone.now()
+        for turf, item in zip(turfs, items):
+            _apply(turf, item)
+            fields.update(field for field in BULK_FIELDS if field in item)
+            if "pitch_type" in item:
+                fields.add("pitch_type")
+            # bulk_update does not run auto_now
+            turf.updated_at = now
+        Turf.objects.bulk_update(turfs, sorted(fields))
+        _write_relations(turfs, items)
+        refresh_derived_data([turf.pk for turf in turfs])
+    return turfs
@@ -0,0 +1,187 @@
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+CACHE_ALIAS = getattr(settings, 'TURF_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'TURF_CACHE_TIMEOUT', 300)
+# Backends private to each process: a worker that missed a bump keeps its old versions
+LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def shared_cache():
+    """Whether every worker sees the same cache, and so the same collection versions."""
+    return settings.CACHES[CACHE_ALIAS]['BACKEND'] not in LOCAL_BACKENDS
+
+
+def _version_key(collection):
+    return f"turf:version:{collection}"
+
+
+def get_version(collection):
+    """
+    Current version of a collection ("turfs", "pitchtypes", ...). Cached
+    responses are keyed on it, so bumping the version invalidates them all.
+    """
+    cache = _cache()
+    key = _version_key(collection)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock rather than 1 so a worker whose (local) cache
+        # was empty never hands out a version another worker already used.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_last_modified(collection):
+    """Unix time of the last change to a collection (seeded with now when unknown)."""
+    cache = _cache()
+    key = f"turf:modified:{collection}"
+    modified = cache.get(key)
+    if modified is None:
+        cache.add(key, int(time.time()), None)
+        modified = cache.get(key)
+    return modified
+
+
+def bump_version(*collections):
+    cache = _cache()
+    now = int(time.time())
+    for collection in collections:
+        try:
+            cache.incr(_version_key(collection))
+        except ValueError:
+            cache.set(_version_key(collection), time.time_ns(), None)
+        cache.set(f"turf:modified:{collection}", now, None)
+
+
+def _record(stat):
+    cache = _cache()
+    key = f"turf:stats:{stat}"
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def get_stats():
+    cache = _cache()
+    hits = cache.get("turf:stats:hits", 0)
+    misses = cache.get("turf:stats:misses", 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else None,
+    }
+
+
+def response_cache_key(request, collection):
+    # Normalize the query string so ?a=1&b=2 and ?b=2&a=1 share an entry
+    params = sorted((key, sorted(values)) for key, values in request.query_params.lists())
+    raw = request.build_absolute_uri(request.path) + "?" + urlencode(params, doseq=True)
+    digest = hashlib.md5(raw.encode("utf-8")).hexdigest()
+    return f"turf:response:{collection}:{get_version(collection)}:{digest}"
+
+
+def _time_dependent(view, request):
+    # Answers to these parameters change with the clock, not with the data
+    return any(param in request.query_params for param in getattr(view, "uncached_params", ()))
+
+
+def cached_response(method):
+    """
+    Cache the data of successful GET responses from a view method, keyed on
+    the view's `cache_collection` version and the normalized query parameters.
+    Requests using any of the view's `uncached_params` are not cached, and
+    nothing is cached unless the cache is shared between workers (see
+    shared_cache).
+    """
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        # A per-worker cache only sees the version bumps of its own worker's
+        # writes, so the other workers would serve stale data until timeout
+        if not shared_cache() or _time_dependent(self, request):
+            return method(self, request, *args, **kwargs)
+        cache = _cache()
+        key = response_cache_key(request, self.cache_collection)
+        data = cache.get(key)
+        if data is not None:
+            _record("hits")
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+        _record("misses")
+        response = method(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, CACHE_TIMEOUT)
+        response["X-Cache"] = "MISS"
+        return response
+    return wrapper
+
+
+class CachedReadMixin:
+    """Serve list and retrieve from the response cache."""
+    cache_collection = None
+
+    @cached_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cached_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+
+class ConditionalGetMixin:
+    """
+    Answer list and retrieve with 304 Not Modified when the client's
+    If-None-Match/If-Modified-Since still match, before any queryset work or
+    serialization. Validators default to the `cache_collection` version;
+    override get_validators() for finer-grained ones. Only enabled when the
+    cache is shared between workers (see shared_cache).
+    """
+    cache_collection = None
+
+    def get_validators(self, request, *args, **kwargs):
+        """Return (etag, last_modified unix time) for the requested resource."""
+        etag = f"{self.cache_collection}-{get_version(self.cache_collection)}"
+        return etag, get_last_modified(self.cache_collection)
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        # As in cached_response; here a stale version would last as long as the worker
+        if not shared_cache() or _time_dependent(self, request):
+            return handler(request, *args, **kwargs)
+        etag, last_modified = self.get_validators(request, *args, **kwargs)
+        if etag is None:
+            return handler(request, *args, **kwargs)
+        response = get_conditional_response(request._request, etag=quote_etag(etag), last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response["ETag"] = quote_etag(etag)
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,72 @@
+"""
+Facet counts for the turf filter sidebar.
+
+facet_counts() answers with a single UNION ALL query over the filtered
+turfs. Each option table (pitch types, purposes, facilities) counts its
+matching turfs by conditional aggregation, so options with no match still
+come back with 0. The price part groups the turfs into TURF_PRICE_BUCKETS.
+"""
+from django.conf import settings
+from django.db.models import Case, CharField, Count, IntegerField, Q, Value, When
+
+from .models import Facility, PitchType, Purpose
+
+# Upper bounds of the price buckets; the last bucket has no upper bound
+PRICE_BUCKETS = [
+    int(bound) for bound in str(getattr(settings, "TURF_PRICE_BUCKETS", "100,200,300,500")).split(",") if bound.strip()
+]
+
+LOOKUP_FACETS = (
+    ("pitch_types", PitchType),
+    ("purposes", Purpose),
+    ("facilities", Facility),
+)
+
+
+def price_buckets():
+    """[(min, max)] for PRICE_BUCKETS; min inclusive, max exclusive and None for the last."""
+    bounds = [0, *PRICE_BUCKETS]
+    return list(zip(bounds, [*PRICE_BUCKETS, None]))
+
+
+def _bucket():
+    return Case(
+        *(When(price_per_hour__lt=bound, then=Value(index)) for index, bound in enumerate(PRICE_BUCKETS)),
+        default=Value(len(PRICE_BUCKETS)),
+        output_field=IntegerField(),
+    )
+
+
+def facet_counts(turfs):
+    """
+    Counts of the turfs in `turfs` per pitch type, purpose, facility and
+    price bucket, plus the total.
+    """
+    matching = turfs.order_by().values("pk")
+    parts = [
+        model.objects.order_by()
+        .annotate(facet=Value(facet, output_field=CharField()), matched=Count("turf", filter=Q(turf__in=matching)))
+        .values_list("facet", "pk", "name", "matched")
+        for facet, model in LOOKUP_FACETS
+    ]
+    parts.append(
+        turfs.order_by()
+        .annotate(facet=Value("price", output_field=CharField()), bucket=_bucket())
+        .values("facet", "bucket")
+        .annotate(label=Value("", output_field=CharField()), matched=Count("pk"))
+        .values_list("facet", "bucket", "label", "matched")
+    )
+    result = {facet: [] for facet, _ in LOOKUP_FACETS}
+    prices = {}
+    for facet, value, label, matched in parts[0].union(*parts[1:], all=True):
+        if facet == "price":
+            prices[value] = matched
+        else:
+            result[facet].append({"id": value, "name": label, "count": matched})
+    for options in result.values():
+        options.sort(key=lambda option: option["name"])
+    result["price"] = [
+        {"min": low, "max": high, "count": prices.get(index, 0)} for index, (low, high) in enumerate(price_buckets())
+    ]
+    result["total"] = sum(prices.values())
+    return result
@@ -1,5 +1,51 @@
 import django_filters
-from .models import Turf, PitchType, Purpose, Facility
+from django import forms
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import Count, F, FloatField, Q
+from django.db.models.functions import Cast
+from django.utils import timezone
+from rest_framework.filters import SearchFilter
+from .geo import within_radius
+from .models import Turf, PitchType, Purpose, Facility, SEARCH_CONFIG
+
+
+class TurfSearchFilter(SearchFilter):
+    """
+    Ranked full-text search over the stored Turf.search_vector document
+    (name above location above pitch description). Trigram similarity on
+    the name lets misspelt terms still match. Both predicates are served by
+    GIN indexes, so cost does not grow with a sequential scan of the table.
+    Results are ordered by relevance unless an ordering was already applied.
+    """
+    # ts_rank weights for D, C, B, A
+    weights = [0.1, 0.3, 0.6, 1.0]
+    # Share of the rank contributed by name similarity
+    typo_weight = 0.5
+
+    def filter_queryset(self, request, queryset, view):
+        terms = " ".join(self.get_search_terms(request))
+        if not terms:
+            return queryset
+        query = SearchQuery(terms, search_type="websearch", config=SEARCH_CONFIG)
+        rank = SearchRank(F("search_vector"), query, weights=self.weights) + self.typo_weight * TrigramWordSimilarity(terms, "name")
+        queryset = queryset.filter(Q(search_vector=query) | Q(name__trigram_word_similar=terms)).annotate(
+            # double precision so cursor positions round-trip exactly
+            search_rank=Cast(rank, FloatField()),
+        )
+        if not queryset.query.order_by:
+            queryset = queryset.order_by("-search_rank", "id")
+        return queryset
+
+
+class TurfFilterForm(forms.Form):
+    def clean(self):
+        cleaned_data = super().clean()
+        lat, lon = cleaned_data.get("lat"), cleaned_data.get("lon")
+        if (lat is None) != (lon is None):
+            raise forms.ValidationError("lat and lon must be given together.")
+        if cleaned_data.get("radius_km") is not None and lat is None:
+            raise forms.ValidationError("radius_km needs lat and lon.")
+        return cleaned_data
 
 
 class TurfFilter(django_filters.FilterSet):
@@ -27,22 +73,61 @@ class TurfFilter(django_filters.FilterSet):
     # Price per hour (range filter)
     price_per_hour = django_filters.RangeFilter(label="Price Per Hour")
 
-    # Purposes (M2M, allow multiple)
+    # Purposes (M2M, allow multiple; turfs must have all of them)
     purposes = django_filters.ModelMultipleChoiceFilter(
         field_name="purposes",
         queryset=Purpose.objects.all(),
+        method="filter_all_of",
         label="Purposes"
     )
 
-    # Facilities (M2M, allow multiple)
+    # Facilities (M2M, allow multiple; turfs must have all of them)
     facilities = django_filters.ModelMultipleChoiceFilter(
         field_name="facilities",
         queryset=Facility.objects.all(),
+        method="filter_all_of",
         label="Facilities"
     )
 
+    # Within radius_km of lat/lon
+    lat = django_filters.NumberFilter(method="filter_near", min_value=-90, max_value=90, label="Latitude")
+    lon = django_filters.NumberFilter(method="filter_near", min_value=-180, max_value=180, label="Longitude")
+    radius_km = django_filters.NumberFilter(method="filter_near", min_value=0, label="Radius (km)")
+
+    # Opening hours (see OpeningHours): open at a given time, or right now
+    open_at = django_filters.IsoDateTimeFilter(method="filter_open_at", label="Open at")
+    open_now = django_filters.BooleanFilter(method="filter_open_now", label="Open now")
+
+    def filter_all_of(self, queryset, name, value):
+        # One grouped subquery on the through table instead of a join per value
+        ids = {obj.pk for obj in value}
+        if not ids:
+            # Nothing selected arrives as an empty queryset, which django-filter does not skip
+            return queryset
+        field = Turf._meta.get_field(name)
+        source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+        matching = field.remote_field.through.objects.filter(**{f"{target}__in": ids}).values(source).annotate(
+            matched=Count(target)
+        ).filter(matched=len(ids)).values(source)
+        return queryset.filter(pk__in=matching)
+
+    def filter_near(self, queryset, name, value):
+        # lat and lon only mean something with radius_km; it applies all three
+        if name != "radius_km":
+            return queryset
+        data = self.form.cleaned_data
+        return within_radius(queryset, float(data["lat"]), float(data["lon"]), float(value))
+
+    def filter_open_at(self, queryset, name, value):
+        return queryset.open_at(value)
+
+    def filter_open_now(self, queryset, name, value):
+        open_now = queryset.open_at(timezone.now())
+        return open_now if value else queryset.exclude(pk__in=open_now.values("pk"))
+
     class Meta:
         model = Turf
+        form = TurfFilterForm
         fields = [
             "pitch_type",
             "price_per_hour",
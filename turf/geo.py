@@ -0,0 +1,174 @@
+import math
+
+import numpy as np
+from django.conf import settings
+from django.db.models import F, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+from .indexes import ReloadingIndex
+
+EARTH_RADIUS_KM = 6371
+# Length of one degree of latitude (and of longitude at the equator)
+KM_PER_DEGREE = 2 * math.pi * EARTH_RADIUS_KM / 360
+# Half the earth's circumference: no two points are further apart than this
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
+    c = 2*math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+def bounding_box(lat, lon, radius_km):
+    """
+    Return (min_lat, max_lat, min_lon, max_lon) enclosing every point within
+    radius_km of (lat, lon). Longitude bounds are None when the box would
+    cross the antimeridian or a pole, in which case only latitude is usable.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90), min(max_lat, 90), None, None
+    # asin keeps the box tight: the widest point of the circle is not on the
+    # query's own parallel but slightly towards the pole.
+    dlon = math.degrees(math.asin(min(1.0, math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(lat)))))
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180 or max_lon > 180:
+        return min_lat, max_lat, None, None
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def within_box(queryset, lat, lon, radius_km):
+    """Restrict queryset to the (indexed) bounding box around a point."""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    queryset = queryset.filter(latitude__range=(min_lat, max_lat))
+    if min_lon is not None:
+        queryset = queryset.filter(longitude__range=(min_lon, max_lon))
+    return queryset
+
+
+def distance_expression(lat, lon):
+    """Haversine distance in km from (lat, lon) to a turf, as a SQL expression."""
+    a = Power(Sin(Radians(F("latitude") - lat) / 2), 2) + math.cos(math.radians(lat)) * Cos(
+        Radians("latitude")
+    ) * Power(Sin(Radians(F("longitude") - lon) / 2), 2)
+    # Rounding can push `a` a hair past 1, outside asin's domain
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(Least(a, Value(1.0))))
+
+
+def within_radius(queryset, lat, lon, radius_km):
+    """Restrict queryset to turfs within radius_km: the indexed bounding box, then the exact distance."""
+    return within_box(queryset, lat, lon, radius_km).alias(
+        distance_km=distance_expression(lat, lon)
+    ).filter(distance_km__lte=radius_km)
+
+
+class TurfLocationIndex(ReloadingIndex):
+    """
+    In-process nearest-turf engine.
+
+    Turf coordinates live in contiguous float64 arrays (radians) so a query is
+    a single vectorized haversine pass plus a partial sort for the top k.
+    Rows are (id, lat, lon).
+    """
+
+    def _source_rows(self):
+        from .models import Turf
+        return Turf.objects.filter(latitude__isnull=False, longitude__isnull=False).values_list('id', 'latitude', 'longitude')
+
+    def _set_rows(self, rows):
+        rows = list(rows)
+        self._size = len(rows)
+        capacity = max(16, self._size)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._lat = np.zeros(capacity, dtype=np.float64)
+        self._lon = np.zeros(capacity, dtype=np.float64)
+        self._cos_lat = np.zeros(capacity, dtype=np.float64)
+        self._positions = {}
+        if rows:
+            ids, lats, lons = zip(*rows)
+            self._ids[:self._size] = ids
+            self._lat[:self._size] = np.radians(lats)
+            self._lon[:self._size] = np.radians(lons)
+            self._cos_lat[:self._size] = np.cos(self._lat[:self._size])
+            self._positions = {pk: i for i, pk in enumerate(ids)}
+
+    def _grow(self):
+        capacity = len(self._ids) * 2
+        for name in ('_ids', '_lat', '_lon', '_cos_lat'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def upsert(self, pk, lat, lon):
+        if self._loaded_at is None:
+            return
+        if lat is None or lon is None:
+            self.remove(pk)
+            return
+        with self._lock:
+            i = self._positions.get(pk)
+            if i is None:
+                if self._size == len(self._ids):
+                    self._grow()
+                i = self._size
+                self._size += 1
+                self._positions[pk] = i
+                self._ids[i] = pk
+            self._lat[i] = math.radians(lat)
+            self._lon[i] = math.radians(lon)
+            self._cos_lat[i] = math.cos(self._lat[i])
+
+    def remove(self, pk):
+        with self._lock:
+            i = self._positions.pop(pk, None)
+            if i is None:
+                return
+            last = self._size - 1
+            if i != last:
+                # Move the last row into the hole to keep the arrays dense
+                for arr in (self._ids, self._lat, self._lon, self._cos_lat):
+                    arr[i] = arr[last]
+                self._positions[int(self._ids[i])] = i
+            self._size = last
+
+    def nearest(self, lat, lon, limit, radius_km=None, after=None, include=None):
+        """
+        Return up to `limit` (id, distance_km) pairs, closest first. `after`
+        is a (distance_km, id) keyset: only turfs ordered after it are
+        returned. `include`, a collection of ids, restricts the candidates.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            n = self._size
+            ids = self._ids[:n]
+            phi = math.radians(lat)
+            a = (np.sin((self._lat[:n] - phi) / 2) ** 2
+                 + math.cos(phi) * self._cos_lat[:n] * np.sin((self._lon[:n] - math.radians(lon)) / 2) ** 2)
+            distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+            mask = np.ones(n, dtype=bool)
+            if radius_km is not None:
+                mask &= distances <= radius_km
+            if after is not None:
+                after_distance, after_id = after
+                mask &= (distances > after_distance) | ((distances == after_distance) & (ids > after_id))
+            if include is not None:
+                mask &= np.isin(ids, np.fromiter(include, dtype=np.int64, count=len(include)))
+            candidates = np.flatnonzero(mask)
+            if len(candidates) > limit:
+                kth = np.partition(distances[candidates], limit - 1)[limit - 1]
+                # Keep every turf tied with the k-th, so the id tie-break (and
+                # with it the `after` keyset) sees all of them
+                candidates = candidates[distances[candidates] <= kth]
+            order = np.lexsort((ids[candidates], distances[candidates]))
+            candidates = candidates[order][:limit]
+            return [(int(pk), float(d)) for pk, d in zip(ids[candidates], distances[candidates])]
+
+
+location_index = TurfLocationIndex(ttl=getattr(settings, 'TURF_GEO_INDEX_TTL', 300))
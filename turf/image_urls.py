@@ -0,0 +1,89 @@
+"""
+Cloudinary delivery URLs for turf photos.
+
+Every URL is one of the named PRESETS applied to an image's public id. The
+result is deterministic, so build_url memoizes it in a bounded per-process
+LRU cache (TURF_IMAGE_URL_CACHE_SIZE entries).
+"""
+from functools import lru_cache
+
+from cloudinary.utils import cloudinary_url
+from django.conf import settings
+
+URL_CACHE_SIZE = getattr(settings, "TURF_IMAGE_URL_CACHE_SIZE", 4096)
+
+
+def _limit(width):
+    # Automatic format and quality, scaled down (never up) to `width`
+    return ({"fetch_format": "auto", "quality": "auto"}, {"crop": "limit", "width": width})
+
+
+PRESETS = {
+    "thumb": _limit(400),
+    "card": _limit(800),  # turf list
+    "large": _limit(1200),
+    "detail": _limit(1600),  # turf detail
+}
+# Presets offered as responsive renditions, smallest first
+RENDITION_PRESETS = ("thumb", "card", "large", "detail")
+
+
+def preset_width(preset):
+    return PRESETS[preset][-1]["width"]
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def build_url(public_id, preset):
+    url, _ = cloudinary_url(public_id, secure=True, transformation=[dict(step) for step in PRESETS[preset]])
+    return url
+
+
+def rendition_urls(public_id, width=None):
+    """
+    [{"width": ..., "url": ...}] for each rendition preset, smallest first.
+    Given the image's own width, presets wider than it are dropped (bar the
+    first, which delivers the image at full size) and widths are capped.
+    """
+    renditions = []
+    for preset in RENDITION_PRESETS:
+        limit = preset_width(preset)
+        renditions.append({"width": min(limit, width) if width else limit, "url": build_url(public_id, preset)})
+        if width and limit >= width:
+            break
+    return renditions
+
+
+def image_srcset(image):
+    """Rendition list of a TurfImage; built on the fly for images processed before renditions were stored."""
+    if not image or not image.image:
+        return []
+    if image.renditions:
+        return image.renditions
+    public_id = getattr(image.image, 'public_id', None)
+    return rendition_urls(public_id, image.width) if public_id else []
+
+
+def image_url(image, preset):
+    """URL of a TurfImage in one of the PRESETS."""
+    if not image or not image.image:
+        return None
+    if image.renditions:
+        # Smallest stored rendition at least as wide (or the largest there is)
+        width = preset_width(preset)
+        return next((r["url"] for r in image.renditions if r["width"] >= width), image.renditions[-1]["url"])
+    public_id = getattr(image.image, 'public_id', None)
+    if not public_id:
+        return image.image.url
+    return build_url(public_id, preset)
+
+
+def get_stats():
+    info = build_url.cache_info()
+    total = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": info.hits / total if total else None,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+    }
@@ -0,0 +1,163 @@
+"""
+Photo optimization shared by the admin upload form and the API pipeline.
+
+Images are downscaled to at most MAX_WIDTH pixels wide, rotated upright
+according to their EXIF orientation (the tag itself, and the rest of the
+EXIF block, is dropped) and re-encoded at the highest quality step that
+fits in MAX_BYTES.
+
+Memory stays bounded per image: the pixel count is checked from the header
+before anything is decoded, JPEGs are decoded at reduced resolution, and
+encoded output goes to temporary files rather than in-memory buffers.
+
+While the image is decoded anyway, process_photo also records what clients
+need to lay out and preview it without another request: its dimensions,
+size, dominant colour and a tiny blurred placeholder.
+"""
+import base64
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from PIL import ExifTags, Image, ImageOps
+
+MAX_WIDTH = 2000
+MAX_BYTES = 10 * 1024 * 1024
+# Largest image decoded (about a 48MP phone photo plus headroom)
+MAX_PIXELS = 60_000_000
+# Quality steps tried, best first; the chosen step is found by binary search
+QUALITY_STEPS = (85, 80, 75, 70, 65, 60)
+
+PLACEHOLDER_WIDTH = 16
+
+OUTPUT_FORMATS = ("JPEG", "PNG", "WEBP")
+# EXIF orientations that swap width and height
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+def _max_pixels():
+    return getattr(settings, "TURF_IMAGE_MAX_PIXELS", MAX_PIXELS)
+
+
+def check_image_size(file_obj, max_pixels=None):
+    """
+    Raise ImageTooLarge if the image has more pixels than allowed. Only the
+    header is read, so this is cheap enough to run during validation.
+    """
+    max_pixels = max_pixels or _max_pixels()
+    file_obj.seek(0)
+    with Image.open(file_obj) as img:
+        width, height = img.size
+    file_obj.seek(0)
+    if width * height > max_pixels:
+        raise ImageTooLarge(
+            f"Image is {width}x{height} ({width * height / 1e6:.0f} MP); the limit is {max_pixels / 1e6:.0f} MP."
+        )
+
+
+def _encode(img, img_format, quality, icc_profile, name):
+    output = TemporaryUploadedFile(name, f"image/{img_format.lower()}", 0, None)
+    params = {"format": img_format, "optimize": True}
+    if img_format in ("JPEG", "WEBP"):
+        params["quality"] = quality
+    if icc_profile:
+        params["icc_profile"] = icc_profile
+    img.save(output.file, **params)
+    output.size = output.file.tell()
+    output.seek(0)
+    return output
+
+
+def _fit_quality(img, img_format, max_bytes, icc_profile, name):
+    """Encode at the best quality step whose output fits in max_bytes."""
+    best = _encode(img, img_format, QUALITY_STEPS[0], icc_profile, name)
+    if best.size <= max_bytes or img_format == "PNG":
+        return best
+    best.close()
+    # Steps 1..n-1 are still candidates; the lowest is used even if too big
+    lo, hi = 1, len(QUALITY_STEPS) - 1
+    best = None
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        output = _encode(img, img_format, QUALITY_STEPS[mid], icc_profile, name)
+        if output.size <= max_bytes:
+            if best is not None:
+                best.close()
+            best = output
+            hi = mid - 1
+        else:
+            output.close()
+            lo = mid + 1
+    return best or _encode(img, img_format, QUALITY_STEPS[-1], icc_profile, name)
+
+
+def load_image(file_obj, max_width=MAX_WIDTH):
+    """
+    Open an upload and return (img, img_format) with the image upright and
+    no wider than max_width. JPEGs are decoded at a reduced scale (1/2, 1/4
+    or 1/8) when that still leaves enough pixels, which is much faster and
+    lighter than decoding at full size and resizing.
+    """
+    check_image_size(file_obj)
+    img = Image.open(file_obj)
+    img_format = (img.format or "JPEG").upper()
+    if img_format not in OUTPUT_FORMATS:
+        img_format = "JPEG"
+    if img.format == "JPEG":
+        rotated = img.getexif().get(ExifTags.Base.Orientation) in ROTATED_ORIENTATIONS
+        # Width and height as displayed, once the orientation is applied
+        w, h = img.size[::-1] if rotated else img.size
+        if w > max_width:
+            target = (max_width, max(1, h * max_width // w))
+            img.draft(img.mode, target[::-1] if rotated else target)
+    ImageOps.exif_transpose(img, in_place=True)
+    if img.width > max_width:
+        img.thumbnail((max_width, img.height), Image.LANCZOS)
+    if img_format == "JPEG" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    return img, img_format
+
+
+def describe_image(img):
+    """Width, height, dominant colour and a tiny base64 placeholder of a decoded image."""
+    sample = img.convert("RGB")
+    sample.thumbnail((64, 64))
+    palette = sample.quantize(colors=5)
+    _, index = max(palette.getcolors())
+    r, g, b = palette.getpalette()[index * 3:index * 3 + 3]
+    height = max(1, round(PLACEHOLDER_WIDTH * img.height / img.width))
+    placeholder = sample.resize((PLACEHOLDER_WIDTH, height))
+    buffer = BytesIO()
+    placeholder.save(buffer, format="JPEG", quality=40)
+    return {
+        "width": img.width,
+        "height": img.height,
+        "dominant_color": f"#{r:02x}{g:02x}{b:02x}",
+        "placeholder": "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii"),
+    }
+
+
+def process_photo(file_obj, max_width=MAX_WIDTH, max_bytes=MAX_BYTES):
+    """
+    Optimize an uploaded image. Returns (TemporaryUploadedFile, info) where
+    info holds the metadata stored on TurfImage (see describe_image, plus
+    the encoded size in bytes).
+    """
+    img, img_format = load_image(file_obj, max_width)
+    filename = getattr(file_obj, "name", None) or f"upload.{img_format.lower()}"
+    try:
+        info = describe_image(img)
+        output = _fit_quality(img, img_format, max_bytes, img.info.get("icc_profile"), filename)
+    finally:
+        img.close()
+    info["bytes"] = output.size
+    return output, info
+
+
+def optimize_image(file_obj, max_width=MAX_WIDTH, max_bytes=MAX_BYTES):
+    """Return an optimized copy of an uploaded image as a TemporaryUploadedFile."""
+    return process_photo(file_obj, max_width, max_bytes)[0]
@@ -0,0 +1,42 @@
+import threading
+import time
+
+
+class ReloadingIndex:
+    """
+    Base for the per-worker in-memory turf indexes.
+
+    Subclasses keep their data in `_set_rows(rows)` and say which rows to
+    load in `_source_rows()`. Rows are patched in place from Turf
+    save/delete signals; the whole index is reloaded from the database every
+    `ttl` seconds so workers that did not see a signal catch up. Reads and
+    writes of the index hold `_lock`.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._set_rows([])
+
+    def _set_rows(self, rows):
+        raise NotImplementedError
+
+    def _source_rows(self):
+        raise NotImplementedError
+
+    def load(self, rows=None):
+        """Replace the index contents with `rows`, by default from the database."""
+        if rows is None:
+            rows = self._source_rows()
+        with self._lock:
+            self._set_rows(rows)
+            self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+            self.load()
+
+    def invalidate(self):
+        """Force a full reload on the next query."""
+        self._loaded_at = None
@@ -0,0 +1,326 @@
+import json
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIRequestFactory
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cloudinary import CloudinaryResource
+
+from turf.geo import TurfLocationIndex, haversine
+from turf.image_urls import build_url
+from turf.images import optimize_image
+from turf.memory import reset_peak_rss, rss_kb
+from turf.models import Turf, TurfImage
+from turf.serializers import TurfListSerializer
+from turf.suggest import suggest
+from turf.views import AvailableTurfsView
+
+# Roughly Ghana, where the catalogue lives
+LAT_RANGE = (4.7, 11.2)
+LON_RANGE = (-3.3, 1.2)
+PITCH_TYPES = ("Astro turf", "Natural grass", "Futsal court", "Sand")
+PURPOSES = ("Football", "Basketball", "Volleyball", "Tennis", "Events")
+FACILITIES = ("Parking", "Changing rooms", "Floodlights", "Showers", "Cafeteria", "Seating")
+
+
+def _latencies(timings):
+    """p50, p95 and max of a list of millisecond timings."""
+    p95 = statistics.quantiles(timings, n=20, method="inclusive")[-1] if len(timings) > 1 else timings[0]
+    return f"p50 {statistics.median(timings):.2f} ms, p95 {p95:.2f} ms, max {max(timings):.2f} ms"
+
+
+def _legacy_compress(file_obj, max_width=2000, max_bytes=10 * 1024 * 1024):
+    # The resize/compress loop turf.images.optimize_image replaced, kept for comparison
+    img = Image.open(file_obj)
+    img_format = (img.format or "JPEG").upper()
+    if img_format not in ("JPEG", "JPG", "PNG", "WEBP"):
+        img_format = "JPEG"
+    if img.mode in ("RGBA", "P") and img_format in ("JPEG", "JPG"):
+        img = img.convert("RGB")
+    w, h = img.size
+    if w > max_width:
+        ratio = max_width / float(w)
+        img = img.resize((int(w * ratio), int(h * ratio)), Image.LANCZOS)
+    quality = 85
+    buffer = BytesIO()
+    img.save(buffer, format=img_format, optimize=True, quality=quality)
+    while buffer.tell() > max_bytes and quality > 60:
+        quality -= 5
+        buffer.seek(0)
+        buffer.truncate()
+        img.save(buffer, format=img_format, optimize=True, quality=quality)
+    return buffer.tell()
+
+
+def _measure(fn, results):
+    # Runs in a forked child so the peak reflects this workload alone. On
+    # Linux the high-water mark is reset first; elsewhere fall back to
+    # ru_maxrss, which includes whatever the parent had already touched.
+    try:
+        reset_peak_rss()
+        base = rss_kb("VmRSS")
+        peak = lambda: rss_kb("VmHWM")  # noqa: E731
+    except OSError:
+        base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = lambda: resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # noqa: E731
+    wall, cpu = time.perf_counter(), time.process_time()
+    value = fn()
+    results.put((time.perf_counter() - wall, time.process_time() - cpu, peak() - base, value))
+
+
+def _in_child(fn):
+    """Run fn in a forked process; returns (wall s, cpu s, peak rss kB, fn's result)."""
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    child = ctx.Process(target=_measure, args=(fn, results))
+    child.start()
+    measured = results.get()
+    child.join()
+    return measured
+
+
+def _per_request_ms(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+class Command(BaseCommand):
+    help = "Measure the latency of hot code paths (leaves the database unchanged)."
+
+    targets = ("nearest", "suggest", "images", "compress", "serialize", "available", "import")
+    default_sizes = {
+        "nearest": "1000,10000,100000",
+        "images": "1,5,20",
+        "serialize": "20,100",
+        "import": "1000,10000",
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", choices=self.targets)
+        parser.add_argument("--sizes", help="Comma separated catalogue sizes / image counts")
+        parser.add_argument("--repeat", type=int, default=20, help="Requests timed per size")
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--backend", help="Suggest backend to time (default: TURF_SUGGEST_BACKEND)")
+        parser.add_argument("--samples", type=int, default=50, help="Turf names typed per suggest run")
+        parser.add_argument("--concurrency", type=int, help="Image pool size (default: TURF_IMAGE_CONCURRENCY)")
+        parser.add_argument("--upload-latency", type=float, default=0.5, help="Simulated seconds per Cloudinary upload")
+        parser.add_argument("--radius", type=float, default=10, help="radius_km for the available target")
+        parser.add_argument("--corpus", help="Directory of sample photos for the compress target (default: synthetic)")
+
+    def handle(self, *args, **options):
+        try:
+            raw_sizes = options["sizes"] or self.default_sizes.get(options["target"], "")
+            sizes = [int(s) for s in raw_sizes.split(",") if s.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be a comma separated list of integers")
+        getattr(self, f"bench_{options['target']}")(sizes, options)
+
+    def bench_nearest(self, sizes, options):
+        rng = random.Random(0)
+        limit, repeat = options["limit"], options["repeat"]
+        self.stdout.write(f"{'turfs':>8} {'python loop ms':>15} {'numpy ms':>10} {'speedup':>8}")
+        for size in sizes:
+            rows = [(i, rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)) for i in range(1, size + 1)]
+            lat, lon = rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)
+
+            def loop():
+                # The pre-index implementation: distance to every turf, then a full sort
+                found = [{"turf": pk, "distance": haversine(lat, lon, t_lat, t_lon)} for pk, t_lat, t_lon in rows]
+                found.sort(key=lambda x: x["distance"])
+                return found[:limit]
+
+            index = TurfLocationIndex(ttl=float("inf"))
+            index.load(rows)
+            loop_ms = _per_request_ms(loop, repeat)
+            numpy_ms = _per_request_ms(lambda: index.nearest(lat, lon, limit), repeat)
+            self.stdout.write(f"{size:>8} {loop_ms:>15.2f} {numpy_ms:>10.2f} {loop_ms / numpy_ms:>7.1f}x")
+
+    def bench_suggest(self, sizes, options):
+        # Replays typing: every prefix of a sample of real turf names and
+        # locations, one suggest call per keystroke, against the current data.
+        words = list(Turf.objects.values_list("name", flat=True)) + [
+            loc for loc in Turf.objects.values_list("location", flat=True) if loc
+        ]
+        if not words:
+            raise CommandError("No turfs in the database to type")
+        rng = random.Random(0)
+        timings = []
+        for word in rng.sample(words, min(options["samples"], len(words))):
+            for end in range(1, len(word) + 1):
+                start = time.perf_counter()
+                suggest(word[:end], 8, backend=options["backend"])
+                timings.append((time.perf_counter() - start) * 1000)
+        self.stdout.write(
+            f"{len(timings)} keystrokes over {len(words)} names/locations: "
+            f"{_latencies(timings)}"
+        )
+
+    def bench_images(self, sizes, options):
+        # Compression is real; the Cloudinary upload is replaced by a sleep
+        # of --upload-latency seconds so no network or credentials are needed.
+        concurrency = options["concurrency"] or getattr(settings, "TURF_IMAGE_CONCURRENCY", 4)
+        photo = BytesIO()
+        # 12MP noise compresses like a real phone photo rather than a flat colour
+        Image.effect_noise((4000, 3000), 64).convert("RGB").save(photo, format="JPEG", quality=92)
+        photo = photo.getvalue()
+
+        def handle_one(_):
+            compressed = optimize_image(BytesIO(photo))
+            compressed.close()
+            time.sleep(options["upload_latency"])
+
+        def serial(count):
+            for i in range(count):
+                handle_one(i)
+
+        def pooled(count):
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(executor.map(handle_one, range(count)))
+
+        self.stdout.write(f"concurrency {concurrency}, peak RSS in MB")
+        self.stdout.write(f"{'images':>7} {'serial s':>9} {'serial MB':>10} {'pool s':>7} {'pool MB':>8}")
+        for count in sizes:
+            serial_s, _, serial_kb, _ = _in_child(lambda: serial(count))
+            pool_s, _, pool_kb, _ = _in_child(lambda: pooled(count))
+            self.stdout.write(f"{count:>7} {serial_s:>9.2f} {serial_kb / 1024:>10.1f} {pool_s:>7.2f} {pool_kb / 1024:>8.1f}")
+
+    def bench_compress(self, sizes, options):
+        if options["corpus"]:
+            names = sorted(os.listdir(options["corpus"]))
+            photos = []
+            for name in names:
+                with open(os.path.join(options["corpus"], name), "rb") as f:
+                    photos.append(f.read())
+        else:
+            photos = []
+            for size in ((4000, 3000), (4032, 3024), (3000, 4000), (1600, 1200)):
+                buffer = BytesIO()
+                Image.effect_noise(size, 48).convert("RGB").save(buffer, format="JPEG", quality=92)
+                photos.append(buffer.getvalue())
+        if not photos:
+            raise CommandError("The corpus is empty")
+        variants = (
+            ("legacy loop", _legacy_compress),
+            ("optimize_image", lambda f: optimize_image(f).size),
+        )
+        self.stdout.write(f"{len(photos)} photos")
+        self.stdout.write(f"{'variant':>15} {'cpu s':>7} {'peak rss MB':>12} {'output MB':>10}")
+        for label, fn in variants:
+            _, cpu, peak_kb, total = _in_child(lambda: sum(fn(BytesIO(photo)) for photo in photos))
+            # /proc and ru_maxrss both report kilobytes on Linux
+            self.stdout.write(f"{label:>15} {cpu:>7.2f} {peak_kb / 1024:>12.1f} {total / 1024 / 1024:>10.2f}")
+
+    def bench_serialize(self, sizes, options):
+        # Serializes unsaved turfs whose cover image predates stored
+        # renditions, so every URL goes through build_url. "cold" clears the
+        # URL cache before each request, i.e. what every request cost before
+        # memoization; "warm" is the steady state.
+        repeat = options["repeat"]
+        self.stdout.write(f"{'turfs':>6} {'cold ms':>8} {'warm ms':>8} {'speedup':>8}")
+        for size in sizes:
+            turfs = []
+            for i in range(1, size + 1):
+                turf = Turf(id=i, name=f"Turf {i}", price_per_hour=100, latitude=5.6, longitude=-0.2)
+                image = TurfImage(id=i, turf=turf, image=CloudinaryResource(f"turfs/{i}", version="1", format="jpg"))
+                turf.cover_images = [image]
+                turfs.append(turf)
+
+            def serialize():
+                for turf in turfs:
+                    turf.__dict__.pop("_cover", None)
+                return TurfListSerializer(turfs, many=True).data
+
+            def cold():
+                build_url.cache_clear()
+                serialize()
+
+            cold_ms = _per_request_ms(cold, repeat)
+            serialize()
+            warm_ms = _per_request_ms(serialize, repeat)
+            self.stdout.write(f"{size:>6} {cold_ms:>8.2f} {warm_ms:>8.2f} {cold_ms / warm_ms:>7.1f}x")
+
+    def bench_available(self, sizes, options):
+        # Times /api/turfs/available/ end to end against the current data,
+        # from random points in the catalogue's area, for next Saturday
+        # 18:00-20:00. Seed a large catalogue with import_turfs first.
+        count = Turf.objects.count()
+        if not count:
+            raise CommandError("No turfs in the database to search")
+        today = timezone.localdate()
+        saturday = today + timedelta(days=(5 - today.weekday()) % 7 or 7)
+        starts_at = timezone.make_aware(datetime.combine(saturday, datetime.min.time()).replace(hour=18))
+        params = {
+            "starts_at": starts_at.isoformat(),
+            "ends_at": (starts_at + timedelta(hours=2)).isoformat(),
+            "radius_km": options["radius"],
+            "limit": options["limit"],
+        }
+        view = AvailableTurfsView.as_view()
+        factory = APIRequestFactory()
+        rng = random.Random(0)
+        # The first request loads the location index; leave it out
+        view(factory.get("/api/turfs/available/", {**params, "lat": LAT_RANGE[0], "lon": LON_RANGE[0]}))
+        timings, found = [], 0
+        for _ in range(options["repeat"]):
+            lat, lon = rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)
+            request = factory.get("/api/turfs/available/", {**params, "lat": lat, "lon": lon})
+            start = time.perf_counter()
+            response = view(request)
+            response.render()
+            timings.append((time.perf_counter() - start) * 1000)
+            found += len(response.data["results"])
+        self.stdout.write(
+            f"{len(timings)} searches over {count} turfs ({found / len(timings):.1f} results each): "
+            f"{_latencies(timings)}"
+        )
+
+    def bench_import(self, sizes, options):
+        # import_turfs and export_turfs on synthetic rows shaped like the
+        # catalogue (a pitch type, 2 purposes, 3 facilities and a WhatsApp
+        # number each). Everything runs in one transaction that is rolled back.
+        rng = random.Random(0)
+        self.stdout.write(f"{'rows':>8} {'import rows/s':>14} {'update rows/s':>14} {'export rows/s':>14}")
+        for size in sizes:
+            with tempfile.TemporaryDirectory() as directory, transaction.atomic():
+                path = os.path.join(directory, "turfs.jsonl")
+                with open(path, "w", encoding="utf-8") as rows:
+                    for i in range(size):
+                        rows.write(json.dumps({
+                            "external_id": f"benchmark-{i}",
+                            "name": f"Benchmark turf {i}",
+                            "pitch_type": rng.choice(PITCH_TYPES),
+                            "price_per_hour": rng.randrange(50, 500, 10),
+                            "game_time": "Mon-Fri 6am-11pm\nSat & Sun 8am-10pm",
+                            "location": f"Area {rng.randrange(200)}",
+                            "latitude": rng.uniform(*LAT_RANGE),
+                            "longitude": rng.uniform(*LON_RANGE),
+                            "purposes": rng.sample(PURPOSES, 2),
+                            "facilities": rng.sample(FACILITIES, 3),
+                            "whatsapp_numbers": [f"024{i:07d}"],
+                        }) + "\n")
+                timings = []
+                for command, target in (("import_turfs", path), ("import_turfs", path), ("export_turfs", os.devnull)):
+                    start = time.perf_counter()
+                    call_command(command, target, format="jsonl", no_progress=True, stdout=StringIO(), stderr=StringIO())
+                    timings.append(time.perf_counter() - start)
+                exported = Turf.objects.count()
+                transaction.set_rollback(True)
+            fresh, update, export = timings
+            self.stdout.write(f"{size:>8} {size / fresh:>14.0f} {size / update:>14.0f} {exported / export:>14.0f}")
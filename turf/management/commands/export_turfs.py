@@ -0,0 +1,64 @@
+import csv
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from tqdm import tqdm
+
+from turf.bulk import COLUMNS, M2M_COLUMNS, MULTI_VALUE_SEPARATOR, turf_row
+from turf.models import Turf
+
+
+class Command(BaseCommand):
+    help = "Write every turf to a CSV or JSONL file in the format import_turfs reads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to write, or - for stdout")
+        parser.add_argument("--format", choices=("csv", "jsonl"), help="Default: from the file extension")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Turfs loaded per query")
+        parser.add_argument("--no-progress", action="store_true", help="Hide the progress bar")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        if path == "-":
+            stream = sys.stdout
+        else:
+            try:
+                stream = open(path, "w", newline="", encoding="utf-8")
+            except OSError as exc:
+                raise CommandError(exc)
+
+        turfs = (
+            Turf.objects.defer("search_vector")
+            .select_related("pitch_type")
+            .prefetch_related(*M2M_COLUMNS)
+            .order_by("pk")
+        )
+        if file_format == "csv":
+            writer = csv.DictWriter(stream, fieldnames=COLUMNS)
+            writer.writeheader()
+
+        exported = 0
+        start = time.perf_counter()
+        try:
+            # iterator() streams in chunks, prefetching each chunk's relations
+            rows = turfs.iterator(chunk_size=options["batch_size"])
+            for turf in tqdm(rows, total=turfs.count(), unit=" rows", disable=options["no_progress"]):
+                row = turf_row(turf)
+                if file_format == "csv":
+                    for column in M2M_COLUMNS:
+                        row[column] = MULTI_VALUE_SEPARATOR.join(row[column])
+                    writer.writerow(row)
+                else:
+                    stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+                exported += 1
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        elapsed = time.perf_counter() - start
+        # stderr, so piping to stdout yields a clean file
+        self.stderr.write(self.style.SUCCESS(
+            f"Exported {exported} turfs in {elapsed:.1f}s ({exported / elapsed if elapsed else 0:.0f} rows/s)"
+        ))
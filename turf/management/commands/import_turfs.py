@@ -0,0 +1,158 @@
+import csv
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from tqdm import tqdm
+
+from turf.bulk import M2M_COLUMNS, LookupCache, parse_row, refresh_derived_data, sync_m2m
+from turf.models import Turf, PitchType, Purpose, Facility, WhatsappNumber, CallNumber
+
+# Columns overwritten when the turf already exists
+UPDATE_FIELDS = [
+    "name", "pitch_description", "pitch_type", "price_per_hour", "game_time",
+    "location", "map_link", "latitude", "longitude", "updated_at",
+]
+
+
+def _read_rows(stream, file_format):
+    """Yield (row dict, None) or (None, error) for each record of a CSV or JSONL stream."""
+    if file_format == "csv":
+        for row in csv.DictReader(stream):
+            yield row, None
+        return
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield None, f"invalid JSON: {exc}"
+            continue
+        yield (row, None) if isinstance(row, dict) else (None, "expected a JSON object")
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update turfs from a CSV or JSONL file, matched on external_id, or on id "
+        "for rows without one (as export_turfs writes turfs that have none). "
+        "Every column is replaced, including purposes, facilities and numbers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to read, or - for stdin")
+        parser.add_argument("--format", choices=("csv", "jsonl"), help="Default: from the file extension")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows written per transaction")
+        parser.add_argument("--no-progress", action="store_true", help="Hide the progress bar")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        if path == "-":
+            if not options["format"]:
+                raise CommandError("--format is required when reading from stdin")
+            stream = sys.stdin
+        else:
+            try:
+                stream = open(path, newline="", encoding="utf-8-sig")
+            except OSError as exc:
+                raise CommandError(exc)
+
+        self.lookups = {
+            "pitch_type": LookupCache(PitchType),
+            "purposes": LookupCache(Purpose),
+            "facilities": LookupCache(Facility),
+            "whatsapp_numbers": LookupCache(WhatsappNumber, "number"),
+            "call_numbers": LookupCache(CallNumber, "number"),
+        }
+        imported, errors = 0, []
+        batch = {}
+        start = time.perf_counter()
+        with stream, tqdm(unit=" rows", disable=options["no_progress"]) as progress:
+            for line, (raw, error) in enumerate(_read_rows(stream, file_format), start=2 if file_format == "csv" else 1):
+                progress.update()
+                try:
+                    if error:
+                        raise ValueError(error)
+                    row = parse_row(raw)
+                except ValueError as exc:
+                    errors.append((line, str(exc)))
+                    continue
+                # A later row for the same turf wins
+                key = ("external_id", row["external_id"]) if row["external_id"] else ("id", row["id"])
+                batch[key] = (line, row)
+                if len(batch) >= options["batch_size"]:
+                    imported += self.write_batch(list(batch.values()), errors)
+                    batch = {}
+            if batch:
+                imported += self.write_batch(list(batch.values()), errors)
+        elapsed = time.perf_counter() - start
+
+        errors.sort()
+        for line, message in errors[:20]:
+            self.stderr.write(f"line {line}: {message}")
+        if len(errors) > 20:
+            self.stderr.write(f"... and {len(errors) - 20} more errors")
+        created = ", ".join(f"{lookup.created} {name}" for name, lookup in self.lookups.items() if lookup.created)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} turfs in {elapsed:.1f}s ({imported / elapsed if elapsed else 0:.0f} rows/s), "
+            f"skipped {len(errors)} invalid rows" + (f"; created {created}" if created else "")
+        ))
+
+    def write_batch(self, entries, errors):
+        """Write (line, row) entries; rows naming a missing id go to `errors`. Returns how many were written."""
+        with transaction.atomic():
+            rows = [row for _, row in entries]
+            pitch_types = self.lookups["pitch_type"].resolve({row["pitch_type"] for row in rows})
+            turfs = [
+                Turf(
+                    external_id=row["external_id"],
+                    name=row["name"],
+                    pitch_description=row["pitch_description"],
+                    pitch_type_id=pitch_types.get(row["pitch_type"]),
+                    price_per_hour=row["price_per_hour"],
+                    game_time=row["game_time"],
+                    location=row["location"],
+                    map_link=row["map_link"],
+                    latitude=row["latitude"],
+                    longitude=row["longitude"],
+                )
+                for row in rows
+            ]
+            keyed = [turf for turf in turfs if turf.external_id]
+            if keyed:
+                Turf.objects.bulk_create(
+                    keyed, update_conflicts=True, unique_fields=["external_id"], update_fields=UPDATE_FIELDS
+                )
+                # Not every backend returns ids for updated rows, so look them up
+                ids = dict(
+                    Turf.objects.filter(external_id__in=[turf.external_id for turf in keyed])
+                    .values_list("external_id", "id")
+                )
+                for turf in keyed:
+                    turf.pk = ids[turf.external_id]
+            by_id = {row["id"]: turf for row, turf in zip(rows, turfs) if not turf.external_id}
+            if by_id:
+                found = set(Turf.objects.filter(pk__in=list(by_id)).values_list("pk", flat=True))
+                now = timezone.now()
+                for pk, turf in by_id.items():
+                    if pk in found:
+                        turf.pk = pk
+                        # bulk_update does not run auto_now
+                        turf.updated_at = now
+                Turf.objects.bulk_update([turf for turf in by_id.values() if turf.pk], UPDATE_FIELDS)
+            written = []
+            for (line, row), turf in zip(entries, turfs):
+                if turf.pk:
+                    written.append((turf.pk, row))
+                else:
+                    errors.append((line, f"no turf with id {row['id']}"))
+            for column in M2M_COLUMNS:
+                values = self.lookups[column].resolve({value for _, row in written for value in row[column]})
+                sync_m2m(column, {pk: {values[value] for value in row[column]} for pk, row in written})
+            refresh_derived_data([pk for pk, _ in written])
+        return len(written)
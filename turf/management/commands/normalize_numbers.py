@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from turf.bulk import sync_m2m
+from turf.cache import bump_version
+from turf.models import Turf
+from turf.numbers import InvalidNumber, normalize_number
+from turf.signals import touch_turfs
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite stored WhatsApp and call numbers in E.164 form, merging rows "
+        "that turn out to be the same number. Invalid numbers are reported and left alone."
+    )
+
+    def handle(self, *args, **options):
+        for field_name in ("whatsapp_numbers", "call_numbers"):
+            with transaction.atomic():
+                renamed, merged, invalid = self.normalize(field_name)
+            for number in invalid:
+                self.stderr.write(f"{field_name}: cannot normalize {number!r}")
+            self.stdout.write(self.style.SUCCESS(
+                f"{field_name}: rewrote {renamed}, merged {merged} duplicates, {len(invalid)} invalid"
+            ))
+        transaction.on_commit(lambda: bump_version("turfs", "lookups"))
+
+    def normalize(self, field_name):
+        field = Turf._meta.get_field(field_name)
+        model = field.related_model
+        through = field.remote_field.through
+        source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+
+        groups, invalid = {}, []
+        for row in model.objects.order_by("pk"):
+            try:
+                groups.setdefault(normalize_number(row.number), []).append(row)
+            except InvalidNumber:
+                invalid.append(row.number)
+
+        # Keep the row already holding the normalized number, else the oldest
+        replacement, renames = {}, []
+        for number, rows in groups.items():
+            keep = next((row for row in rows if row.number == number), rows[0])
+            replacement.update((row.pk, keep.pk) for row in rows if row is not keep)
+            if keep.number != number:
+                keep.number = number
+                renames.append(keep)
+
+        if replacement:
+            affected = set(
+                through.objects.filter(**{f"{target}__in": list(replacement)}).values_list(f"{source}_id", flat=True)
+            )
+            wanted = {turf_id: set() for turf_id in affected}
+            for turf_id, target_id in through.objects.filter(**{f"{source}__in": affected}).values_list(
+                f"{source}_id", f"{target}_id"
+            ):
+                wanted[turf_id].add(replacement.get(target_id, target_id))
+            sync_m2m(field_name, wanted)
+            model.objects.filter(pk__in=list(replacement)).delete()
+            touch_turfs(affected)
+        # After the duplicates are gone, so the new values are free
+        model.objects.bulk_update(renames, ["number"], batch_size=1000)
+        return len(renames), len(replacement), invalid
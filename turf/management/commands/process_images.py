@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from turf.pipeline import process_pending
+
+
+class Command(BaseCommand):
+    help = "Compress and upload turf images still waiting in the staging queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--include-stuck",
+            action="store_true",
+            help="Also retry images left 'processing' by a worker that died (only when no worker is running)",
+        )
+        parser.add_argument("--concurrency", type=int, help="Images processed at once (default: TURF_IMAGE_CONCURRENCY)")
+
+    def handle(self, *args, **options):
+        processed = process_pending(include_stuck=options["include_stuck"], concurrency=options["concurrency"])
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} images"))
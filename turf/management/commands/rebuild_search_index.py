@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from turf.cache import bump_version
+from turf.models import Turf
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored full-text search document of every turf."
+
+    def handle(self, *args, **options):
+        updated = Turf.objects.all().update_search_vectors()
+        bump_version("turfs")
+        self.stdout.write(self.style.SUCCESS(f"Updated search documents for {updated} turfs"))
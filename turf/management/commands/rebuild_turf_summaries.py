@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from turf.cache import bump_version
+from turf.models import TurfSummary
+from turf.summary import refresh_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized TurfSummary row of every turf."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows upserted per statement")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            TurfSummary.objects.all().delete()
+            refreshed = refresh_summaries(batch_size=options["batch_size"])
+        bump_version("turfs")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt summaries for {refreshed} turfs"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from turf.cache import bump_version
+from turf.models import OpeningHours, Turf
+from turf.schedule import sync_opening_hours
+
+
+class Command(BaseCommand):
+    help = "Parse every turf's game_time into OpeningHours rows, replacing the existing ones."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            errors = sync_opening_hours()
+        bump_version("turfs")
+        names = dict(Turf.objects.filter(pk__in=list(errors)).values_list("pk", "name"))
+        for pk, message in errors.items():
+            self.stderr.write(f"{names.get(pk, pk)} (id {pk}): {message}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {OpeningHours.objects.count()} opening hours; {len(errors)} turfs could not be parsed"
+        ))
@@ -0,0 +1,18 @@
+"""
+Resident memory of the current process, read from Linux /proc; used to
+check the peak memory of image processing (benchmark images, the tests).
+"""
+
+
+def rss_kb(field="VmRSS"):
+    """A memory line of /proc/self/status in kB: VmRSS (current) or VmHWM (peak)."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+
+
+def reset_peak_rss():
+    """Reset VmHWM to the current RSS. Raises OSError where /proc does not allow it."""
+    with open("/proc/self/clear_refs", "w") as clear_refs:
+        clear_refs.write("5")
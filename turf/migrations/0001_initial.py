@@ -0,0 +1,87 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:38
+
+import cloudinary.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CallNumber',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.CharField(max_length=20, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Facility',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GameTime',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PitchType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Purpose',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WhatsappNumber',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.CharField(max_length=20, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Turf',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('pitch_description', models.TextField(blank=True, null=True)),
+                ('price_per_hour', models.IntegerField()),
+                ('game_time', models.TextField(blank=True, help_text='Enter opening hours, e.g.:\n🔒 Open Monday - Friday (6AM - 11PM)\nOpen Saturdays & Sundays (8AM - 11PM)', null=True)),
+                ('location', models.CharField(blank=True, max_length=255, null=True)),
+                ('map_link', models.URLField(blank=True, null=True)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('call_numbers', models.ManyToManyField(blank=True, to='turf.callnumber')),
+                ('facilities', models.ManyToManyField(blank=True, to='turf.facility')),
+                ('pitch_type', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='turf.pitchtype')),
+                ('purposes', models.ManyToManyField(blank=True, to='turf.purpose')),
+                ('whatsapp_numbers', models.ManyToManyField(blank=True, to='turf.whatsappnumber')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TurfImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', cloudinary.models.CloudinaryField(max_length=255, verbose_name='image')),
+                ('uploaded_at', models.DateTimeField(auto_now_add=True)),
+                ('turf', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='turf.turf')),
+            ],
+        ),
+    ]
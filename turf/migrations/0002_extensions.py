@@ -0,0 +1,22 @@
+from django.contrib.postgres.operations import BtreeGistExtension, TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Postgres extensions the schema needs: btree_gist for the
+    booking_no_overlap exclusion constraint, pg_trgm for the trigram indexes
+    behind suggestions. Creating them needs a role allowed to CREATE
+    EXTENSION (a superuser, or the database owner on Postgres 13+ where
+    both are trusted); otherwise have an admin create them once and this
+    migration is a no-op.
+    """
+
+    dependencies = [
+        ("turf", "0001_initial"),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        TrigramExtension(),
+    ]
@@ -0,0 +1,196 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:39
+
+import cloudinary.models
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+import turf.models
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Search, image processing, opening hours, bookings and the list summary.
+
+    The new tables and columns start empty; fill them once after migrating:
+
+        python manage.py rebuild_search_index
+        python manage.py sync_opening_hours
+        python manage.py rebuild_turf_summaries
+    """
+
+    dependencies = [
+        ('turf', '0002_extensions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Booking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reference', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('customer_name', models.CharField(max_length=100)),
+                ('customer_phone', models.CharField(max_length=20)),
+                ('price', models.IntegerField(editable=False)),
+                ('status', models.CharField(choices=[('confirmed', 'Confirmed'), ('cancelled', 'Cancelled')], default='confirmed', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['starts_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OpeningHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('opens_at', models.PositiveSmallIntegerField(help_text='Minutes since midnight')),
+                ('closes_at', models.PositiveSmallIntegerField(help_text='Minutes since midnight, up to 1440')),
+            ],
+            options={
+                'verbose_name_plural': 'opening hours',
+                'ordering': ['weekday', 'opens_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TurfSummary',
+            fields=[
+                ('turf', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='turf.turf')),
+                ('name', models.CharField(max_length=100)),
+                ('pitch_type', models.CharField(max_length=50, null=True)),
+                ('location', models.CharField(max_length=255, null=True)),
+                ('latitude', models.FloatField(null=True)),
+                ('longitude', models.FloatField(null=True)),
+                ('price', models.IntegerField()),
+                ('image', models.TextField(null=True)),
+                ('image_srcset', models.JSONField(default=list)),
+                ('image_placeholder', models.TextField(blank=True)),
+                ('image_color', models.CharField(blank=True, max_length=7)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='turf',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='turf',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='turf',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='turfimage',
+            name='bytes',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='turfimage',
+            name='dominant_color',
+            field=models.CharField(blank=True, editable=False, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='turfimage',
+            name='error',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='turfimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='turfimage',
+            name='placeholder',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='turfimage',
+            name='renditions',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='turfimage',
+            name='staged_file',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='turfimage',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], db_index=True, default='ready', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='turfimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='turfimage',
+            name='image',
+            field=cloudinary.models.CloudinaryField(blank=True, max_length=255, null=True, verbose_name='image'),
+        ),
+        migrations.AddIndex(
+            model_name='turf',
+            index=models.Index(fields=['latitude', 'longitude'], name='turf_lat_lon_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='turf',
+            index=models.Index(fields=['pitch_type', 'price_per_hour', 'id'], name='turf_pitch_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='turf',
+            index=models.Index(fields=['price_per_hour', 'id'], name='turf_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='turf',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='turf_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='turf',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['location'], name='turf_location_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='turf',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='turf_search_vector_idx'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='turf',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='turf.turf'),
+        ),
+        migrations.AddField(
+            model_name='openinghours',
+            name='turf',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='opening_hours', to='turf.turf'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['turf', 'starts_at', 'ends_at'], name='booking_turf_time_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.CheckConstraint(condition=models.Q(('ends_at__gt', models.F('starts_at'))), name='booking_ends_after_start'),
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status', 'confirmed')), expressions=[('turf', '='), (turf.models.TsTzRange('starts_at', 'ends_at', django.contrib.postgres.fields.ranges.RangeBoundary()), '&&')], name='booking_no_overlap'),
+        ),
+        migrations.AddIndex(
+            model_name='openinghours',
+            index=models.Index(fields=['weekday', 'opens_at', 'closes_at'], name='opening_hours_open_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='openinghours',
+            index=models.Index(fields=['turf', 'weekday', 'opens_at', 'closes_at'], name='opening_hours_turf_day_idx'),
+        ),
+    ]
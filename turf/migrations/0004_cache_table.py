@@ -0,0 +1,19 @@
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # Creates the table of every DatabaseCache in CACHES; skips existing ones
+    call_command("createcachetable", database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+    """Table behind the default DatabaseCache (see CACHES in settings)."""
+
+    dependencies = [
+        ("turf", "0003_search_images_hours_bookings"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,16 @@
+import uuid
+from datetime import timedelta
+
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeBoundary, RangeOperators
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.utils import timezone
 from cloudinary.models import CloudinaryField
 
+from .image_urls import rendition_urls
+
 
 class PitchType(models.Model):
     name = models.CharField(max_length=50, unique=True)
@@ -41,7 +51,59 @@ class CallNumber(models.Model):
         return self.number
 
 
+# Full-text search document: name outranks location outranks pitch description
+SEARCH_CONFIG = "english"
+SEARCH_DOCUMENT = (
+    SearchVector("name", weight="A", config=SEARCH_CONFIG)
+    + SearchVector("location", weight="B", config=SEARCH_CONFIG)
+    + SearchVector("pitch_description", weight="C", config=SEARCH_CONFIG)
+)
+
+
+class TurfQuerySet(models.QuerySet):
+    def for_list(self):
+        """Load what TurfListSerializer reads: the pitch type and only the first ready image."""
+        return self.defer("search_vector").select_related("pitch_type").prefetch_related(
+            models.Prefetch(
+                "images",
+                queryset=TurfImage.objects.filter(status=TurfImage.READY).order_by("pk")[:1],
+                to_attr="cover_images",
+            )
+        )
+
+    def update_search_vectors(self):
+        """Recompute the stored search document in a single UPDATE."""
+        return self.update(search_vector=SEARCH_DOCUMENT)
+
+    def for_detail(self):
+        """Load every relation TurfSerializer nests."""
+        return self.defer("search_vector").select_related("pitch_type").prefetch_related(
+            "purposes", "facilities", "whatsapp_numbers", "call_numbers", "images", "opening_hours"
+        )
+
+    def open_at(self, when):
+        """Turfs whose opening hours cover `when`."""
+        return self.filter(models.Exists(OpeningHours.objects.open_at(when).filter(turf=models.OuterRef("pk"))))
+
+    def free_between(self, starts_at, ends_at):
+        """
+        Turfs open for the whole of [starts_at, ends_at) with no confirmed
+        booking overlapping it, as one query: an EXISTS over OpeningHours per
+        local day the window touches and a NOT EXISTS over Booking.
+        """
+        queryset = self.filter(
+            ~models.Exists(Booking.objects.confirmed().overlapping(starts_at, ends_at).filter(turf=models.OuterRef("pk")))
+        )
+        for weekday, opens, closes in day_spans(starts_at, ends_at):
+            queryset = queryset.filter(models.Exists(
+                OpeningHours.objects.covering(weekday, opens, closes).filter(turf=models.OuterRef("pk"))
+            ))
+        return queryset
+
+
 class Turf(models.Model):
+    # Row id in the catalogue spreadsheets; the upsert key for import_turfs
+    external_id = models.CharField(max_length=64, unique=True, null=True, blank=True)
     name = models.CharField(max_length=100)
     pitch_description = models.TextField(blank=True, null=True)
     pitch_type = models.ForeignKey(PitchType, on_delete=models.SET_NULL, null=True)
@@ -57,15 +119,220 @@ class Turf(models.Model):
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = TurfQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Bounding-box prefilter for nearest-turf lookups
+            models.Index(fields=["latitude", "longitude"], name="turf_lat_lon_idx"),
+            # Pitch type plus price range (and cheapest-first) filters, id for cursor ties
+            models.Index(fields=["pitch_type", "price_per_hour", "id"], name="turf_pitch_price_idx"),
+            # Price range and cheapest-first without a pitch type
+            models.Index(fields=["price_per_hour", "id"], name="turf_price_idx"),
+            # Autocomplete; pg_trgm is created by migration 0002_extensions
+            GinIndex(fields=["name"], name="turf_name_trgm_idx", opclasses=["gin_trgm_ops"]),
+            GinIndex(fields=["location"], name="turf_location_trgm_idx", opclasses=["gin_trgm_ops"]),
+            GinIndex(fields=["search_vector"], name="turf_search_vector_idx"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+def day_spans(starts_at, ends_at):
+    """
+    Split [starts_at, ends_at) at local midnights into (weekday, from
+    minute, to minute) spans, in OpeningHours terms; partial minutes round
+    outwards.
+    """
+    spans = []
+    start, end = timezone.localtime(starts_at), timezone.localtime(ends_at)
+    while start < end:
+        midnight = (start + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        if end >= midnight:
+            closes = 24 * 60
+        else:
+            closes = end.hour * 60 + end.minute + (1 if end.second or end.microsecond else 0)
+        spans.append((start.weekday(), start.hour * 60 + start.minute, closes))
+        start = midnight
+    return spans
+
+
+class OpeningHoursQuerySet(models.QuerySet):
+    def open_at(self, when):
+        """Intervals covering `when`, read in the local time zone (TIME_ZONE)."""
+        if timezone.is_naive(when):
+            when = timezone.make_aware(when)
+        local = timezone.localtime(when)
+        minute = local.hour * 60 + local.minute
+        return self.filter(weekday=local.weekday(), opens_at__lte=minute, closes_at__gt=minute)
+
+    def covering(self, weekday, opens, closes):
+        """Intervals spanning all of minutes [opens, closes) of `weekday`."""
+        return self.filter(weekday=weekday, opens_at__lte=opens, closes_at__gte=closes)
+
+
+class OpeningHours(models.Model):
+    """
+    One interval a turf is open, within a single day. Parsed from
+    Turf.game_time by turf.schedule; intervals past midnight are stored as
+    two rows.
+    """
+    WEEKDAY_CHOICES = [
+        (0, "Monday"), (1, "Tuesday"), (2, "Wednesday"), (3, "Thursday"),
+        (4, "Friday"), (5, "Saturday"), (6, "Sunday"),
+    ]
+
+    turf = models.ForeignKey(Turf, on_delete=models.CASCADE, related_name="opening_hours")
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    opens_at = models.PositiveSmallIntegerField(help_text="Minutes since midnight")
+    closes_at = models.PositiveSmallIntegerField(help_text="Minutes since midnight, up to 1440")
+
+    objects = OpeningHoursQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["weekday", "opens_at"]
+        verbose_name_plural = "opening hours"
+        indexes = [
+            # "Open at" lookups: one weekday, then a range on the times
+            models.Index(fields=["weekday", "opens_at", "closes_at"], name="opening_hours_open_at_idx"),
+            # Per-turf probes from Turf.objects.free_between; covers them, where
+            # the plain turf_id index leaves a heap fetch per row
+            models.Index(fields=["turf", "weekday", "opens_at", "closes_at"], name="opening_hours_turf_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_weekday_display()} {self.opens_at // 60:02d}:{self.opens_at % 60:02d}-{self.closes_at // 60:02d}:{self.closes_at % 60:02d}"
+
+
+class TsTzRange(models.Func):
+    function = "TSTZRANGE"
+    output_field = DateTimeRangeField()
+
+
+class BookingQuerySet(models.QuerySet):
+    def confirmed(self):
+        return self.filter(status=Booking.CONFIRMED)
+
+    def overlapping(self, starts_at, ends_at):
+        """Bookings sharing any time with [starts_at, ends_at)."""
+        return self.filter(starts_at__lt=ends_at, ends_at__gt=starts_at)
+
+
+class Booking(models.Model):
+    """A turf reserved for [starts_at, ends_at); see turf.booking."""
+    CONFIRMED = "confirmed"
+    CANCELLED = "cancelled"
+    STATUS_CHOICES = [
+        (CONFIRMED, "Confirmed"),
+        (CANCELLED, "Cancelled"),
+    ]
+
+    # Public handle for the booking, so ids cannot be enumerated
+    reference = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    turf = models.ForeignKey(Turf, on_delete=models.CASCADE, related_name="bookings")
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    customer_name = models.CharField(max_length=100)
+    customer_phone = models.CharField(max_length=20)  # E.164
+    price = models.IntegerField(editable=False)  # price_per_hour when booked, for the whole booking
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=CONFIRMED)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = BookingQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["starts_at"]
+        indexes = [
+            models.Index(fields=["turf", "starts_at", "ends_at"], name="booking_turf_time_idx"),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(ends_at__gt=models.F("starts_at")), name="booking_ends_after_start"),
+            # Backstop for turf.booking's row lock: confirmed bookings of a
+            # turf never overlap. Needs btree_gist, created by migration
+            # 0002_extensions.
+            ExclusionConstraint(
+                name="booking_no_overlap",
+                expressions=[
+                    ("turf", RangeOperators.EQUAL),
+                    (TsTzRange("starts_at", "ends_at", RangeBoundary()), RangeOperators.OVERLAPS),
+                ],
+                condition=models.Q(status="confirmed"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.turf.name} {self.starts_at:%Y-%m-%d %H:%M}-{self.ends_at:%H:%M}"
+
+
+class TurfSummary(models.Model):
+    """
+    Denormalized read model behind the turf list and nearest endpoints: one
+    row per turf holding exactly what a card or map pin shows, so those
+    endpoints read it with values() instead of joining and serializing
+    models. Kept current by turf.signals (see turf.summary).
+    """
+    turf = models.OneToOneField(Turf, on_delete=models.CASCADE, primary_key=True, related_name="summary")
+    name = models.CharField(max_length=100)
+    pitch_type = models.CharField(max_length=50, null=True)  # PitchType.name
+    location = models.CharField(max_length=255, null=True)
+    latitude = models.FloatField(null=True)
+    longitude = models.FloatField(null=True)
+    price = models.IntegerField()
+    # Cover image: the first ready TurfImage
+    image = models.TextField(null=True)  # "card" preset URL
+    image_srcset = models.JSONField(default=list)
+    image_placeholder = models.TextField(blank=True)
+    image_color = models.CharField(max_length=7, blank=True)
+    refreshed_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
 
 class TurfImage(models.Model):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    READY = "ready"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (PROCESSING, "Processing"),
+        (READY, "Ready"),
+        (FAILED, "Failed"),
+    ]
+
     turf = models.ForeignKey(Turf, on_delete=models.CASCADE, related_name="images")
-    image = CloudinaryField("image")  # stored in Cloudinary
+    image = CloudinaryField("image", blank=True, null=True)  # stored in Cloudinary, set once processed
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=READY, db_index=True)
+    error = models.TextField(blank=True, editable=False)  # why processing failed
+    # Raw upload waiting in the staging directory (see turf.pipeline)
+    staged_file = models.CharField(max_length=255, blank=True, editable=False)
+    # Recorded when the photo is optimized (see turf.images.process_photo) so
+    # clients can reserve space and show a preview before the image loads
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    bytes = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    dominant_color = models.CharField(max_length=7, blank=True, editable=False)  # "#rrggbb"
+    placeholder = models.TextField(blank=True, editable=False)  # tiny JPEG as a data: URI
+    # [{"width": ..., "url": ...}] smallest first, built once the image is in Cloudinary
+    renditions = models.JSONField(default=list, blank=True, editable=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.turf.name} - {self.image.url if self.image else 'No image'}"
\ No newline at end of file
+        return f"{self.turf.name} - {self.image.url if self.image else 'No image'}"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "image" not in update_fields:
+            return
+        # The public id is only known once the field has uploaded the file
+        public_id = getattr(self.image, "public_id", None)
+        renditions = rendition_urls(public_id, self.width) if public_id else []
+        if renditions != self.renditions:
+            self.renditions = renditions
+            TurfImage.objects.filter(pk=self.pk).update(renditions=renditions)
\ No newline at end of file
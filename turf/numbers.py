@@ -0,0 +1,92 @@
+"""
+Phone numbers for turfs (WhatsApp and call), stored in E.164 form.
+
+Numbers are normalized before they are looked up, so "024 123 4567",
+"+233241234567" and "00233 24 123 4567" share one row. Local numbers
+(leading 0) get TURF_PHONE_COUNTRY_CODE.
+"""
+import re
+
+from django.conf import settings
+from django.db import transaction
+
+from .cache import bump_version
+from .models import Turf
+from .signals import touch_turfs
+
+DEFAULT_COUNTRY_CODE = getattr(settings, "TURF_PHONE_COUNTRY_CODE", "233")
+# Characters people put between digits
+SEPARATORS = re.compile(r"[\s\-().]")
+
+
+class InvalidNumber(ValueError):
+    pass
+
+
+def split_numbers(raw):
+    """Split text holding numbers separated by commas or new lines."""
+    if not raw:
+        return []
+    parts = [p.strip() for p in raw.replace("\r", "").replace(",", "\n").split("\n")]
+    return [p for p in parts if p]
+
+
+def normalize_number(raw, country_code=None):
+    """Return `raw` in E.164 form ("+233241234567") or raise InvalidNumber."""
+    country_code = country_code or DEFAULT_COUNTRY_CODE
+    number = SEPARATORS.sub("", str(raw))
+    if number.startswith("00"):
+        number = "+" + number[2:]
+    if number.startswith("+"):
+        digits = number[1:]
+    elif number.startswith("0"):
+        digits = country_code + number[1:]
+    else:
+        # Either already international without the "+", or local without the 0
+        digits = number if number.startswith(country_code) and len(number) > 10 else country_code + number
+    if not digits.isdigit() or not 8 <= len(digits) <= 15:
+        raise InvalidNumber(f"{raw!r} is not a valid phone number")
+    return "+" + digits
+
+
+def normalize_numbers(values, country_code=None):
+    """Normalize and de-duplicate numbers, keeping their order. Raises InvalidNumber listing every bad one."""
+    normalized, invalid = [], []
+    for value in values:
+        try:
+            normalized.append(normalize_number(value, country_code))
+        except InvalidNumber:
+            invalid.append(str(value))
+    if invalid:
+        raise InvalidNumber(f"Invalid phone number{'s' if len(invalid) > 1 else ''}: {', '.join(invalid)}")
+    return list(dict.fromkeys(normalized))
+
+
+def resolve_numbers(model, numbers):
+    """
+    Return {number: id} for already normalized `numbers`, creating missing
+    rows: one SELECT, plus one INSERT and one SELECT when some are new.
+    """
+    ids = dict(model.objects.filter(number__in=numbers).values_list("number", "id"))
+    missing = [number for number in numbers if number not in ids]
+    if missing:
+        model.objects.bulk_create([model(number=number) for number in missing], ignore_conflicts=True)
+        ids.update(model.objects.filter(number__in=missing).values_list("number", "id"))
+    return ids
+
+
+def sync_numbers(turf, field_name, numbers):
+    """
+    Make turf.<field_name> ("whatsapp_numbers" or "call_numbers") hold
+    exactly `numbers`, normalizing them first. Returns (added, removed).
+    """
+    from .bulk import sync_m2m  # bulk imports this module
+    numbers = normalize_numbers(numbers)
+    model = Turf._meta.get_field(field_name).related_model
+    ids = resolve_numbers(model, numbers)
+    added, removed = sync_m2m(field_name, {turf.pk: set(ids.values())})
+    if added or removed:
+        # The through-table writes bypass m2m_changed, so do its work here
+        touch_turfs([turf.pk])
+        transaction.on_commit(lambda: bump_version("turfs", "lookups"))
+    return added, removed
@@ -0,0 +1,77 @@
+from base64 import b64decode, b64encode
+
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class TurfCursorPagination(CursorPagination):
+    """
+    Cursor pagination for the turf list, newest first. When TurfFilter's
+    `ordering` parameter is used, pages follow that ordering with id as the
+    tie-breaker so positions stay stable.
+    """
+    ordering = ("-created_at", "-id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    # Cursor positions cannot be NULL, so nullable sort keys are paged on a coalesced copy
+    nullable_fields = {
+        "location": Coalesce("location", Value("")),
+    }
+
+    def paginate_queryset(self, queryset, request, view=None):
+        order_by = []
+        for field in queryset.query.order_by:
+            if isinstance(field, str) and field.lstrip("-") in self.nullable_fields:
+                name = field.lstrip("-")
+                queryset = queryset.annotate(**{f"{name}_key": self.nullable_fields[name]})
+                field = field.replace(name, f"{name}_key")
+            order_by.append(field)
+        return super().paginate_queryset(queryset.order_by(*order_by), request, view)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = [field for field in queryset.query.order_by if isinstance(field, str)]
+        if not ordering:
+            return self.ordering
+        if not any(field.lstrip("-") in ("id", "pk") for field in ordering):
+            ordering.append("-id" if ordering[0].startswith("-") else "id")
+        return tuple(ordering)
+
+
+class DistanceCursorPagination:
+    """
+    Keyset pagination for NearestTurfsView. The cursor carries the distance
+    and id of the last turf served, so the next page starts strictly after
+    it without replaying earlier pages.
+    """
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            distance, pk = b64decode(encoded.encode("ascii")).decode("ascii").split(":")
+            return float(distance), int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, distance, pk):
+        return b64encode(f"{distance!r}:{pk}".encode("ascii")).decode("ascii")
+
+    def get_next_link(self, request, page, limit):
+        if len(page) < limit:
+            return None
+        pk, distance = page[-1]
+        return replace_query_param(request.build_absolute_uri(), self.cursor_query_param, self.encode_cursor(distance, pk))
+
+    def get_paginated_response(self, request, page, limit, data):
+        return Response({
+            "next": self.get_next_link(request, page, limit),
+            "results": data,
+        })
@@ -0,0 +1,132 @@
+"""
+Background processing for turf photos uploaded through the API.
+
+Uploads are written to a local staging directory and recorded as
+TurfImage rows with status "pending"; those rows are the queue. After the
+request's transaction commits, the images are handed to a bounded
+in-process thread pool (TURF_IMAGE_CONCURRENCY) which compresses each one,
+uploads it to Cloudinary, records its size, colour, placeholder and
+rendition URLs and marks it "ready", or "failed" with the reason
+in TurfImage.error. Rows are claimed with SELECT ... FOR UPDATE SKIP
+LOCKED, so `manage.py process_images` can safely drain whatever a
+restarted worker left behind.
+"""
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import UploadedFile
+from django.db import connections, transaction
+
+from .images import process_photo
+from .models import TurfImage
+
+logger = logging.getLogger(__name__)
+
+staging_storage = FileSystemStorage(location=getattr(settings, "TURF_IMAGE_STAGING_ROOT", None))
+
+_executor = None
+
+
+def _concurrency():
+    return getattr(settings, "TURF_IMAGE_CONCURRENCY", 4)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # Pillow releases the GIL while decoding, resizing and encoding and the
+        # Cloudinary upload is network-bound, so threads overlap well.
+        _executor = ThreadPoolExecutor(max_workers=_concurrency(), thread_name_prefix="turf-images")
+    return _executor
+
+
+def stage_images(turf, files):
+    """Save raw uploads to staging and queue them; returns the pending TurfImages."""
+    images = []
+    for file_obj in files:
+        extension = os.path.splitext(getattr(file_obj, "name", "") or "")[1].lower()
+        staged_name = staging_storage.save(f"{uuid.uuid4().hex}{extension}", file_obj)
+        images.append(TurfImage.objects.create(turf=turf, status=TurfImage.PENDING, staged_file=staged_name))
+    if images:
+        ids = [image.pk for image in images]
+        transaction.on_commit(lambda: submit(ids))
+    return images
+
+
+def submit(image_ids):
+    """Process images on the background pool."""
+    executor = _get_executor()
+    for image_id in image_ids:
+        executor.submit(_run_in_thread, image_id)
+
+
+def _run_in_thread(image_id, statuses=(TurfImage.PENDING,)):
+    try:
+        return process_image(image_id, statuses)
+    finally:
+        # Pool threads hold their own database connections
+        connections.close_all()
+
+
+def _claim(image_id, statuses):
+    with transaction.atomic():
+        image = (
+            TurfImage.objects.select_for_update(skip_locked=True)
+            .filter(pk=image_id, status__in=statuses)
+            .first()
+        )
+        if image is None:
+            return None
+        image.status = TurfImage.PROCESSING
+        image.save(update_fields=["status"])
+        return image
+
+
+def process_image(image_id, statuses=(TurfImage.PENDING,)):
+    """Compress and upload one staged image. Returns False if it was not claimable."""
+    image = _claim(image_id, statuses)
+    if image is None:
+        return False
+    try:
+        with staging_storage.open(image.staged_file, "rb") as staged:
+            try:
+                upload, info = process_photo(staged)
+            except Exception:
+                # Not something Pillow can re-encode; upload it untouched
+                logger.warning("Could not compress turf image %s", image.pk, exc_info=True)
+                staged.seek(0)
+                upload, info = UploadedFile(staged, name=image.staged_file), {}
+            for field, value in info.items():
+                setattr(image, field, value)
+            image.image = upload
+            image.status = TurfImage.READY
+            try:
+                image.save()
+            finally:
+                # Drops the temporary file holding the encoded image
+                upload.close()
+    except Exception as exc:
+        logger.exception("Processing turf image %s failed", image.pk)
+        image.status = TurfImage.FAILED
+        image.error = f"{type(exc).__name__}: {exc}"[:500]
+        image.save(update_fields=["status", "error"])
+        return True
+    staging_storage.delete(image.staged_file)
+    image.staged_file = ""
+    image.save(update_fields=["staged_file"])
+    return True
+
+
+def process_pending(include_stuck=False, concurrency=None):
+    """
+    Process every queued image on a pool of `concurrency` threads (default
+    TURF_IMAGE_CONCURRENCY); returns how many were handled.
+    """
+    statuses = (TurfImage.PENDING, TurfImage.PROCESSING) if include_stuck else (TurfImage.PENDING,)
+    ids = list(TurfImage.objects.filter(status__in=statuses).order_by("pk").values_list("pk", flat=True))
+    with ThreadPoolExecutor(max_workers=concurrency or _concurrency(), thread_name_prefix="turf-images") as executor:
+        return sum(executor.map(lambda image_id: _run_in_thread(image_id, statuses), ids))
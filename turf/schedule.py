@@ -0,0 +1,203 @@
+"""
+Parsing of the free-text Turf.game_time into weekly opening hours.
+
+Turf owners write hours the way the admin help text shows, e.g.
+
+    Open Monday - Friday (6AM - 11PM)
+    Open Saturdays & Sundays (8AM - 11PM)
+
+Each line may name days (single days, ranges, lists joined by "&", ","
+or "and", "daily", "weekdays", "weekends") and one or more time ranges;
+each time range applies to the days named before it, so one line can hold
+several clauses ("Weekends: 7am-9pm; Weekdays: 5pm-11pm"). Times with no
+days apply to every day; "24 hours" or "24/7" means the whole day, and
+"closed on Sundays" or "Sundays closed", anywhere in the text, removes
+those days. Intervals past midnight are split at
+midnight, so every interval lies within one day: (weekday, opens_at,
+closes_at) with Monday = 0 and times in minutes since midnight (closes_at
+up to 1440).
+"""
+import re
+
+from django.core.exceptions import ValidationError
+
+from .models import OpeningHours, Turf
+
+MINUTES_PER_DAY = 24 * 60
+
+DAYS = {
+    "mon": 0, "monday": 0,
+    "tue": 1, "tues": 1, "tuesday": 1,
+    "wed": 2, "weds": 2, "wednesday": 2,
+    "thu": 3, "thur": 3, "thurs": 3, "thursday": 3,
+    "fri": 4, "friday": 4,
+    "sat": 5, "saturday": 5,
+    "sun": 6, "sunday": 6,
+}
+DAY_GROUPS = {
+    "daily": range(7), "everyday": range(7), "every day": range(7), "all week": range(7),
+    "weekdays": range(5), "weekday": range(5),
+    "weekends": range(5, 7), "weekend": range(5, 7),
+}
+
+_DAY_NAME = r"(?:%s)s?\b" % "|".join(sorted(DAYS, key=len, reverse=True))
+_DAY_RANGE = re.compile(rf"\b({_DAY_NAME})\s*(?:-|–|to|through|thru)\s*({_DAY_NAME})", re.I)
+_DAY = re.compile(rf"\b({_DAY_NAME})", re.I)
+_DAY_GROUP = re.compile(r"\b(%s)\b" % "|".join(sorted(DAY_GROUPS, key=len, reverse=True)), re.I)
+# "12 midnight" and "12 noon" are one time, not 12 o'clock followed by a word
+_TIME = r"(?:(?:12(?::00)?\s*)?(midnight|noon|midday)|(\d{1,2})(?:[:.](\d{2}))?\s*([ap]\.?m\.?)?)"
+_TIME_RANGE = r"%s\s*(?:-|–|to|till|until)\s*%s" % (_TIME, _TIME)
+_ALL_DAY = r"24\s*(?:hours|hrs|/\s*7)"
+# Either "24 hours" (no groups) or a time range (eight groups)
+_TIME_TOKEN = re.compile(rf"{_ALL_DAY}|{_TIME_RANGE}", re.I)
+# A day or day group not followed by a time before the next "," or ";"
+_FREE_DAY = r"\b(?:%s|(?:%s)\b)(?![^;,]*\d)" % (_DAY_NAME, "|".join(sorted(DAY_GROUPS, key=len, reverse=True)))
+_FREE_DAYS = rf"{_FREE_DAY}(?:\s*(?:&|,|/|and|or|-|–|to|through|thru)?\s*{_FREE_DAY})*"
+# "Sundays closed", "closed on Sundays & Mondays", or a bare "closed"
+_CLOSED = re.compile(rf"(?:{_FREE_DAYS}\s*:?\s*)?\bclosed\b(?:\s*(?:on|every|all day)\b)*(?:\s*:?\s*{_FREE_DAYS})?", re.I)
+
+
+class ScheduleError(ValueError):
+    pass
+
+
+def _day(name):
+    name = name.lower()
+    return DAYS.get(name, DAYS.get(name[:-1]))
+
+
+def _minutes(hour, minute, meridiem, word):
+    if word:
+        return 0 if word.lower() == "midnight" else 12 * 60
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            raise ScheduleError(f"{hour}{meridiem} is not a time")
+        hour = hour % 12 + (12 if meridiem.lower().startswith("p") else 0)
+    if hour > 24 or minute > 59:
+        raise ScheduleError(f"{hour}:{minute:02d} is not a time")
+    return hour * 60 + minute
+
+
+def _days(line):
+    days = set()
+    for group in _DAY_GROUP.findall(line):
+        days.update(DAY_GROUPS[group.lower()])
+    for start, end in _DAY_RANGE.findall(line):
+        first, last = _day(start), _day(end)
+        # Wraps round the week, e.g. Friday - Monday
+        days.update((first + i) % 7 for i in range((last - first) % 7 + 1))
+    for name in _DAY.findall(_DAY_RANGE.sub(" ", line)):
+        days.add(_day(name))
+    return days
+
+
+def _time_range(match):
+    w1, h1, m1, ap1, w2, h2, m2, ap2 = match.groups()
+    if not any(match.groups()):
+        return 0, MINUTES_PER_DAY  # 24 hours
+    # "6 - 11PM": the first time takes the second's meridiem
+    if h1 and not ap1 and ap2 and not w1:
+        opens = _minutes(h1, m1, ap2, None)
+        if opens >= _minutes(h2, m2, ap2, None):
+            opens = _minutes(h1, m1, "am" if ap2.lower().startswith("p") else "pm", None)
+    else:
+        opens = _minutes(h1, m1, ap1, w1)
+    return opens, _minutes(h2, m2, ap2, w2)
+
+
+def _segments(line):
+    """
+    [(days, (opens, closes))] for one line. Each time range applies to the
+    days named since the previous one ("Sat 8am-11pm, Sun 2pm-10pm"), else
+    to the same days as the previous range ("Mon-Fri 6-9am & 4-10pm").
+    Days may instead follow the times when no range has days before it
+    ("6am - 11pm, Mon-Fri"); with no days at all it means every day.
+    """
+    tokens = list(_TIME_TOKEN.finditer(line))
+    if not tokens:
+        if _days(line):
+            raise ScheduleError(f"No opening times in {line!r}")
+        return []
+    starts = [0] + [token.end() for token in tokens[:-1]]
+    own_days = [_days(line[start:token.start()]) for start, token in zip(starts, tokens)]
+    trailing = _days(line[tokens[-1].end():])
+    if trailing:
+        if any(own_days):
+            raise ScheduleError(f"Cannot tell which times {line!r} gives each day; put the days before their times")
+        own_days = [trailing] * len(tokens)
+    segments, days = [], set(range(7))
+    for token, named in zip(tokens, own_days):
+        days = named or days
+        segments.append((days, _time_range(token)))
+    return segments
+
+
+def parse_schedule(text):
+    """
+    Return sorted, merged (weekday, opens_at, closes_at) intervals for the
+    opening hours in `text`. Days said to be "closed" (e.g. "Open Mon-Sat
+    6am-10pm (closed Sundays)") are taken out of the week. Raises
+    ScheduleError if days are named without times, a time cannot be read or
+    the text gives no opening hours at all; empty text gives [].
+    """
+    # (weekday, opens, closes, the day the interval started on)
+    intervals = set()
+    closed = set()
+    for line in (text or "").splitlines():
+        for match in _CLOSED.finditer(line):
+            closed.update(_days(match.group()))
+        for days, (opens, closes) in _segments(_CLOSED.sub(" ", line)):
+            if closes == 0:
+                closes = MINUTES_PER_DAY
+            for day in days:
+                if closes > opens:
+                    intervals.add((day, opens, closes, day))
+                elif closes < opens:
+                    # Past midnight: the rest of the night belongs to the next day
+                    intervals.add((day, opens, MINUTES_PER_DAY, day))
+                    intervals.add(((day + 1) % 7, 0, closes, day))
+    merged = _merge(sorted((day, opens, closes) for day, opens, closes, start in intervals if start not in closed))
+    if not merged and (text or "").strip():
+        raise ScheduleError(f"No opening hours in {text!r}")
+    return merged
+
+
+def validate_game_time(text):
+    """Refuse game_time text that parse_schedule can't read, since the opening hours come from it."""
+    try:
+        parse_schedule(text)
+    except ScheduleError as exc:
+        raise ValidationError(str(exc))
+
+
+def _merge(intervals):
+    merged = []
+    for day, opens, closes in intervals:
+        if merged and merged[-1][0] == day and opens <= merged[-1][2]:
+            merged[-1] = (day, merged[-1][1], max(merged[-1][2], closes))
+        else:
+            merged.append((day, opens, closes))
+    return merged
+
+
+def sync_opening_hours(turf_ids=None):
+    """
+    Replace the OpeningHours rows of `turf_ids` (every turf when None) with
+    their parsed game_time. Turfs whose text cannot be parsed are left with
+    no hours; returns {turf id: error message} for them.
+    """
+    turfs = Turf.objects.all() if turf_ids is None else Turf.objects.filter(pk__in=list(turf_ids))
+    rows, errors, ids = [], {}, []
+    for pk, text in turfs.values_list("pk", "game_time").iterator():
+        ids.append(pk)
+        try:
+            intervals = parse_schedule(text)
+        except ScheduleError as exc:
+            errors[pk] = str(exc)
+            continue
+        rows.extend(OpeningHours(turf_id=pk, weekday=d, opens_at=o, closes_at=c) for d, o, c in intervals)
+    hours = OpeningHours.objects.all() if turf_ids is None else OpeningHours.objects.filter(turf_id__in=ids)
+    hours.delete()
+    OpeningHours.objects.bulk_create(rows, batch_size=1000)
+    return errors
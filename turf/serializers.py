@@ -1,10 +1,16 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Turf, PitchType, GameTime, Purpose, Facility, TurfImage, WhatsappNumber, CallNumber
-from cloudinary.utils import cloudinary_url
-from PIL import Image
-from io import BytesIO
-from django.core.files.uploadedfile import InMemoryUploadedFile
-import sys
+from django.utils import timezone
+from .models import (
+    Turf, PitchType, GameTime, Purpose, Facility, TurfImage, WhatsappNumber, CallNumber, OpeningHours, Booking
+)
+from .booking import SLOT_MINUTES, create_booking, on_grid
+from .image_urls import image_srcset, image_url
+from .images import ImageTooLarge, check_image_size
+from .numbers import InvalidNumber, normalize_number, normalize_numbers, sync_numbers
+from .pipeline import stage_images
+from .schedule import validate_game_time
+from .summary import summary_rows
 
 
 class PitchTypeSerializer(serializers.ModelSerializer):
@@ -31,24 +37,29 @@ class FacilitySerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+def validate_numbers(numbers):
+    try:
+        return normalize_numbers(numbers)
+    except InvalidNumber as exc:
+        raise serializers.ValidationError(str(exc))
+
+
 class TurfImageSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = TurfImage
-        fields = ["id", "image"]
+        fields = [
+            "id", "image", "srcset", "width", "height", "bytes",
+            "dominant_color", "placeholder", "status", "error"
+        ]
 
     def get_image(self, obj):
-        if not obj.image:
-            return None
-        public_id = getattr(obj.image, 'public_id', None)
-        if not public_id:
-            return obj.image.url
-        url, _ = cloudinary_url(public_id, secure=True, transformation=[
-            {"fetch_format": "auto", "quality": "auto"},
-            {"crop": "limit", "width": 1600}
-        ])
-        return url
+        return image_url(obj, "detail")
+
+    def get_srcset(self, obj):
+        return image_srcset(obj)
 
 
 class WhatsappNumberSerializer(serializers.ModelSerializer):
@@ -62,6 +73,12 @@ class CallNumberSerializer(serializers.ModelSerializer):
         fields = ["id", "number"]
 
 
+class OpeningHoursSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OpeningHours
+        fields = ["weekday", "opens_at", "closes_at"]
+
+
 class TurfSerializer(serializers.ModelSerializer):
     pitch_type = PitchTypeSerializer(read_only=True)
     game_time = serializers.CharField()
@@ -70,114 +87,324 @@ class TurfSerializer(serializers.ModelSerializer):
     whatsapp_numbers = WhatsappNumberSerializer(many=True, read_only=True)
     call_numbers = CallNumberSerializer(many=True, read_only=True)
     images = TurfImageSerializer(many=True, read_only=True)
+    # Parsed from game_time; minutes since midnight, Monday = 0
+    opening_hours = OpeningHoursSerializer(many=True, read_only=True)
     uploaded_images = serializers.ListField(
         child=serializers.ImageField(help_text="Images are optimized automatically on delivery"),
         write_only=True,
         required=False,
         help_text="Images are optimized automatically on delivery"
     )
+    whatsapp_numbers_input = serializers.ListField(
+        child=serializers.CharField(max_length=32),
+        write_only=True,
+        required=False,
+        help_text="Replaces the WhatsApp numbers; local numbers get the default country code"
+    )
+    call_numbers_input = serializers.ListField(
+        child=serializers.CharField(max_length=32),
+        write_only=True,
+        required=False,
+        help_text="Replaces the call numbers; local numbers get the default country code"
+    )
     class Meta:
         model = Turf
         fields = [
-            "id", "name", "pitch_description", "pitch_type", "price_per_hour",
-            "game_time", "purposes", "facilities",
+            "id", "external_id", "name", "pitch_description", "pitch_type", "price_per_hour",
+            "game_time", "opening_hours", "purposes", "facilities",
             "location", "latitude", "longitude", "map_link", "whatsapp_numbers",
-            "call_numbers", "images", "uploaded_images", "created_at"
+            "call_numbers", "whatsapp_numbers_input", "call_numbers_input",
+            "images", "uploaded_images", "created_at", "updated_at"
         ]
 
-    def _compress_image(self, file_obj, max_width=2000, max_bytes=10 * 1024 * 1024):
-        try:
-            file_obj.seek(0)
-        except Exception:
-            pass
-        img = Image.open(file_obj)
-        img_format = (img.format or 'JPEG').upper()
-        if img_format not in ("JPEG", "JPG", "PNG", "WEBP"):
-            img_format = "JPEG"
-        # Convert to RGB for JPEG/WEBP if needed
-        if img.mode in ("RGBA", "P") and img_format in ("JPEG", "JPG"):
-            img = img.convert("RGB")
-        # Resize if wider than max_width
-        w, h = img.size
-        if w > max_width:
-            ratio = max_width / float(w)
-            new_size = (int(w * ratio), int(h * ratio))
-            img = img.resize(new_size, Image.LANCZOS)
-        # Iteratively reduce quality to fit under max_bytes
-        quality = 85
-        min_quality = 60
-        buffer = BytesIO()
-        img.save(buffer, format="JPEG" if img_format in ("JPEG", "JPG") else img_format, optimize=True, quality=quality)
-        while buffer.tell() > max_bytes and quality > min_quality:
-            quality -= 5
-            buffer.seek(0)
-            buffer.truncate()
-            img.save(buffer, format="JPEG" if img_format in ("JPEG", "JPG") else img_format, optimize=True, quality=quality)
-        buffer.seek(0)
-        # Build InMemoryUploadedFile
-        filename = getattr(file_obj, 'name', f'upload.{img_format.lower()}')
-        content_type = 'image/jpeg' if img_format in ("JPEG", "JPG") else f'image/{img_format.lower()}'
-        compressed_file = InMemoryUploadedFile(
-            buffer,
-            field_name=None,
-            name=filename,
-            content_type=content_type,
-            size=buffer.getbuffer().nbytes,
-            charset=None
-        )
-        return compressed_file
+    def validate_game_time(self, game_time):
+        validate_game_time(game_time)
+        return game_time
 
-    def create(self, validated_data):
-        uploaded_images = validated_data.pop("uploaded_images", [])
-        turf = super().create(validated_data)
+    def validate_whatsapp_numbers_input(self, numbers):
+        return validate_numbers(numbers)
+
+    def validate_call_numbers_input(self, numbers):
+        return validate_numbers(numbers)
 
-        for image in uploaded_images:
+    def _save_numbers(self, turf, numbers):
+        for field, values in numbers.items():
+            if values is not None:
+                sync_numbers(turf, field, values)
+
+    def validate_uploaded_images(self, files):
+        # Refuse oversized photos from their header, before anything decodes them
+        errors = {}
+        for index, file_obj in enumerate(files):
             try:
-                image = self._compress_image(image)
-            except Exception:
-                pass
-            TurfImage.objects.create(turf=turf, image=image)
+                check_image_size(file_obj)
+            except ImageTooLarge as exc:
+                errors[index] = [str(exc)]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return files
 
+    def create(self, validated_data):
+        uploaded_images = validated_data.pop("uploaded_images", [])
+        numbers = {
+            "whatsapp_numbers": validated_data.pop("whatsapp_numbers_input", None),
+            "call_numbers": validated_data.pop("call_numbers_input", None),
+        }
+        turf = super().create(validated_data)
+        self._save_numbers(turf, numbers)
+        # Compression and upload happen in the background; the response
+        # lists the new images as pending.
+        stage_images(turf, uploaded_images)
         return turf
 
     def update(self, instance, validated_data):
         uploaded_images = validated_data.pop("uploaded_images", None)
+        numbers = {
+            "whatsapp_numbers": validated_data.pop("whatsapp_numbers_input", None),
+            "call_numbers": validated_data.pop("call_numbers_input", None),
+        }
         instance = super().update(instance, validated_data)
+        self._save_numbers(instance, numbers)
 
         if uploaded_images is not None:
             # optional: clear old images
             instance.images.all().delete()
-            for image in uploaded_images:
-                try:
-                    image = self._compress_image(image)
-                except Exception:
-                    pass
-                TurfImage.objects.create(turf=instance, image=image)
+            stage_images(instance, uploaded_images)
 
         return instance
 
-    # No size validation: we optimize on delivery via Cloudinary transformations
+
+class TurfBulkItemSerializer(serializers.ModelSerializer):
+    """
+    One turf in a bulk create or update. Lookups are given by id; whether
+    they exist is checked for the whole batch at once by validate_bulk.
+    """
+    id = serializers.IntegerField(required=False)
+    pitch_type = serializers.IntegerField(required=False, allow_null=True)
+    purposes = serializers.ListField(child=serializers.IntegerField(), required=False)
+    facilities = serializers.ListField(child=serializers.IntegerField(), required=False)
+    whatsapp_numbers_input = serializers.ListField(child=serializers.CharField(max_length=32), required=False)
+    call_numbers_input = serializers.ListField(child=serializers.CharField(max_length=32), required=False)
+
+    class Meta:
+        model = Turf
+        fields = [
+            "id", "external_id", "name", "pitch_description", "pitch_type", "price_per_hour",
+            "game_time", "purposes", "facilities", "location", "latitude", "longitude", "map_link",
+            "whatsapp_numbers_input", "call_numbers_input"
+        ]
+        # Uniqueness is checked for the whole batch by validate_bulk
+        extra_kwargs = {"external_id": {"validators": []}}
+
+    def validate_game_time(self, game_time):
+        validate_game_time(game_time)
+        return game_time
+
+    def validate_whatsapp_numbers_input(self, numbers):
+        return validate_numbers(numbers)
+
+    def validate_call_numbers_input(self, numbers):
+        return validate_numbers(numbers)
+
+
+BULK_LOOKUPS = {"pitch_type": PitchType, "purposes": Purpose, "facilities": Facility}
+
+
+def _bulk_max_items():
+    return getattr(settings, "TURF_BULK_MAX_ITEMS", 100)
+
+
+def _check_batch(data):
+    if not isinstance(data, list) or not data:
+        raise serializers.ValidationError("Expected a non-empty list.")
+    if len(data) > _bulk_max_items():
+        raise serializers.ValidationError(f"At most {_bulk_max_items()} items per request.")
+
+
+def validate_bulk(data, partial=False):
+    """
+    Validate a bulk create (partial=False) or update (partial=True, every
+    item needs an "id") payload and return the validated items. Referenced
+    rows are checked with one query per model, however many items there are.
+    Raises ValidationError with errors keyed by item index.
+    """
+    _check_batch(data)
+    items, errors = [], {}
+    for index, raw in enumerate(data):
+        serializer = TurfBulkItemSerializer(data=raw, partial=partial)
+        if serializer.is_valid():
+            item = serializer.validated_data
+            if partial and "id" not in item:
+                _report(errors, index, "id", "This field is required.")
+            elif not partial and "id" in item:
+                _report(errors, index, "id", "Not allowed when creating.")
+        else:
+            item = {}
+            errors[index] = serializer.errors
+        items.append(item)
+
+    for field, model in BULK_LOOKUPS.items():
+        wanted = {pk for item in items for pk in _as_list(item.get(field))}
+        found = set(model.objects.filter(pk__in=wanted).values_list("pk", flat=True)) if wanted else set()
+        for index, item in enumerate(items):
+            for pk in _as_list(item.get(field)):
+                if pk not in found:
+                    _report(errors, index, field, f'Invalid pk "{pk}" - object does not exist.')
+
+    if partial:
+        _check_ids(items, errors)
+
+    seen = {}
+    for index, item in enumerate(items):
+        external_id = item.get("external_id")
+        if external_id:
+            if external_id in seen:
+                _report(errors, index, "external_id", f"Duplicate of item {seen[external_id]}.")
+            seen.setdefault(external_id, index)
+    taken = dict(Turf.objects.filter(external_id__in=seen).values_list("external_id", "pk")) if seen else {}
+    for index, item in enumerate(items):
+        external_id = item.get("external_id")
+        if external_id in taken and taken[external_id] != item.get("id"):
+            _report(errors, index, "external_id", "turf with this external id already exists.")
+
+    if errors:
+        raise serializers.ValidationError(dict(sorted(errors.items())))
+    return items
+
+
+def validate_bulk_ids(data):
+    """Validate a bulk delete payload (a list of turf ids) and return the ids."""
+    _check_batch(data)
+    items, errors = [], {}
+    for index, pk in enumerate(data):
+        if isinstance(pk, int) and not isinstance(pk, bool):
+            items.append({"id": pk})
+        else:
+            items.append({})
+            _report(errors, index, "id", "A valid integer is required.")
+    _check_ids(items, errors)
+    if errors:
+        raise serializers.ValidationError(dict(sorted(errors.items())))
+    return [item["id"] for item in items]
+
+
+def _report(errors, index, field, message):
+    errors.setdefault(index, {}).setdefault(field, []).append(message)
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _check_ids(items, errors):
+    # Every item's turf exists, and no turf appears twice
+    ids = [item["id"] for item in items if "id" in item]
+    found = set(Turf.objects.filter(pk__in=ids).values_list("pk", flat=True)) if ids else set()
+    seen = {}
+    for index, item in enumerate(items):
+        if "id" not in item:
+            continue
+        if item["id"] not in found:
+            _report(errors, index, "id", f'Invalid pk "{item["id"]}" - object does not exist.')
+        elif item["id"] in seen:
+            _report(errors, index, "id", f"Duplicate of item {seen[item['id']]}.")
+        seen.setdefault(item["id"], index)
 
 
 class TurfListSerializer(serializers.ModelSerializer):
     pitch_type = serializers.StringRelatedField()
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
+    image_placeholder = serializers.SerializerMethodField()
+    image_color = serializers.SerializerMethodField()
     price = serializers.IntegerField(source='price_per_hour', read_only=True)
 
     class Meta:
         model = Turf
-        fields = ["id", "name", "pitch_type", "location", "latitude", "longitude", "image", "price"]
+        fields = [
+            "id", "name", "pitch_type", "location", "latitude", "longitude",
+            "image", "image_srcset", "image_placeholder", "image_color", "price"
+        ]
+
+    def _cover(self, obj):
+        # first image or None, looked up once per turf
+        if not hasattr(obj, "_cover"):
+            if hasattr(obj, "cover_images"):
+                # prefetched by Turf.objects.for_list()
+                obj._cover = obj.cover_images[0] if obj.cover_images else None
+            else:
+                obj._cover = obj.images.first()
+        return obj._cover
 
     def get_image(self, obj):
-        # return first image (optimized) or None
-        first = obj.images.first()
-        if not first or not first.image:
-            return None
-        public_id = getattr(first.image, 'public_id', None)
-        if not public_id:
-            return first.image.url
-        url, _ = cloudinary_url(public_id, secure=True, transformation=[
-            {"fetch_format": "auto", "quality": "auto"},
-            {"crop": "limit", "width": 800}
-        ])
-        return url
+        return image_url(self._cover(obj), "card")
+
+    def get_image_srcset(self, obj):
+        return image_srcset(self._cover(obj))
+
+    def get_image_placeholder(self, obj):
+        cover = self._cover(obj)
+        return cover.placeholder if cover else ""
+
+    def get_image_color(self, obj):
+        cover = self._cover(obj)
+        return cover.dominant_color if cover else ""
+
+
+def turf_summaries(ids):
+    """
+    List-card data for the turfs in `ids`, in that order, read from
+    TurfSummary with values(). Turfs without a summary row yet are
+    serialized with TurfListSerializer instead.
+    """
+    rows = summary_rows(ids)
+    missing = [pk for pk in ids if pk not in rows]
+    if missing:
+        for turf in Turf.objects.for_list().filter(pk__in=missing):
+            rows[turf.pk] = TurfListSerializer(turf).data
+    return [rows[pk] for pk in ids if pk in rows]
+
+
+class TurfSummaryListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        return turf_summaries([turf.pk for turf in data])
+
+
+class TurfSummarySerializer(TurfListSerializer):
+    """TurfListSerializer whose many=True form reads the TurfSummary table."""
+    class Meta(TurfListSerializer.Meta):
+        list_serializer_class = TurfSummaryListSerializer
+
+
+class BookingSerializer(serializers.ModelSerializer):
+    turf = serializers.PrimaryKeyRelatedField(queryset=Turf.objects.only("pk"))
+
+    class Meta:
+        model = Booking
+        fields = [
+            "reference", "turf", "starts_at", "ends_at", "customer_name", "customer_phone",
+            "price", "status", "created_at",
+        ]
+        read_only_fields = ["status"]
+
+    def validate_customer_phone(self, value):
+        try:
+            return normalize_number(value)
+        except InvalidNumber as exc:
+            raise serializers.ValidationError(str(exc))
+
+    def validate(self, attrs):
+        starts_at, ends_at = attrs["starts_at"], attrs["ends_at"]
+        if ends_at <= starts_at:
+            raise serializers.ValidationError({"ends_at": "Must be after starts_at."})
+        if starts_at <= timezone.now():
+            raise serializers.ValidationError({"starts_at": "Must be in the future."})
+        if not (on_grid(starts_at) and on_grid(ends_at)):
+            raise serializers.ValidationError(f"Bookings start and end on {SLOT_MINUTES} minute slot boundaries.")
+        return attrs
+
+    def create(self, validated_data):
+        # Raises booking.SlotUnavailable; BookingViewSet answers 409
+        return create_booking(validated_data.pop("turf").pk, **validated_data)
@@ -0,0 +1,113 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_version
+from .geo import location_index
+from .pipeline import staging_storage
+from .suggest import suggest_index
+from .schedule import sync_opening_hours
+from .summary import refresh_summaries
+from .models import (
+    Turf, TurfImage, TurfSummary, PitchType, GameTime, Purpose, Facility, WhatsappNumber, CallNumber
+)
+
+# Response-cache collections each model's rows appear in. Turf payloads embed
+# lookup names and numbers, so changing those also invalidates "turfs", and
+# "lookups" feeds the per-turf detail validators.
+CACHE_COLLECTIONS = {
+    Turf: ("turfs",),
+    TurfImage: ("turfs",),
+    PitchType: ("pitchtypes", "turfs", "lookups"),
+    Purpose: ("purposes", "turfs", "lookups"),
+    Facility: ("facilities", "turfs", "lookups"),
+    GameTime: ("gametimes",),
+    WhatsappNumber: ("turfs", "lookups"),
+    CallNumber: ("turfs", "lookups"),
+}
+
+
+def touch_turfs(turf_ids):
+    """Move updated_at forward for turfs whose related rows changed."""
+    Turf.objects.filter(pk__in=turf_ids).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Turf)
+def turf_saved(sender, instance, **kwargs):
+    Turf.objects.filter(pk=instance.pk).update_search_vectors()
+    refresh_summaries([instance.pk])
+    sync_opening_hours([instance.pk])
+
+    def update_indexes():
+        location_index.upsert(instance.pk, instance.latitude, instance.longitude)
+        suggest_index.upsert(instance.pk, instance.name, instance.location)
+    transaction.on_commit(update_indexes)
+
+
+@receiver(post_delete, sender=Turf)
+def turf_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+
+    def update_indexes():
+        location_index.remove(pk)
+        suggest_index.remove(pk)
+    transaction.on_commit(update_indexes)
+
+
+def invalidate_cached_responses(sender, **kwargs):
+    collections = CACHE_COLLECTIONS[sender]
+    transaction.on_commit(lambda: bump_version(*collections))
+
+
+@receiver(post_save, sender=TurfImage)
+@receiver(post_delete, sender=TurfImage)
+def turf_image_changed(sender, instance, **kwargs):
+    touch_turfs([instance.turf_id])
+    turf_id = instance.turf_id
+    # The cover image may have changed. After commit, because when the turf
+    # itself is being deleted its summary row is already gone by now and
+    # must not be recreated; refresh_summaries skips turfs that no longer exist.
+    transaction.on_commit(lambda: refresh_summaries([turf_id]))
+
+
+@receiver(post_delete, sender=TurfImage)
+def turf_image_deleted(sender, instance, **kwargs):
+    # Pending and failed images still hold their raw upload in staging
+    if instance.staged_file:
+        staged_file = instance.staged_file
+        transaction.on_commit(lambda: staging_storage.delete(staged_file))
+
+
+@receiver(post_save, sender=PitchType)
+def pitch_type_saved(sender, instance, **kwargs):
+    TurfSummary.objects.filter(turf__pitch_type=instance).update(pitch_type=instance.name)
+
+
+@receiver(pre_delete, sender=PitchType)
+def pitch_type_deleted(sender, instance, **kwargs):
+    # Before the turfs' foreign keys are nulled, while we can still find them
+    TurfSummary.objects.filter(turf__pitch_type=instance).update(pitch_type=None)
+
+
+def invalidate_turf_relations(sender, action, instance, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        touch_turfs([instance.pk])
+        collections = ("turfs",)
+    elif pk_set:
+        touch_turfs(pk_set)
+        collections = ("turfs",)
+    else:
+        # A lookup's turfs were cleared and we don't know which they were
+        collections = ("turfs", "lookups")
+    transaction.on_commit(lambda: bump_version(*collections))
+
+
+for model in CACHE_COLLECTIONS:
+    post_save.connect(invalidate_cached_responses, sender=model, dispatch_uid=f"cache-save-{model.__name__}")
+    post_delete.connect(invalidate_cached_responses, sender=model, dispatch_uid=f"cache-delete-{model.__name__}")
+
+for field in ("purposes", "facilities", "whatsapp_numbers", "call_numbers"):
+    m2m_changed.connect(invalidate_turf_relations, sender=getattr(Turf, field).through, dispatch_uid=f"cache-m2m-{field}")
@@ -0,0 +1,245 @@
+import logging
+import re
+import sys
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Coalesce
+
+from .indexes import ReloadingIndex
+from .models import Turf
+
+logger = logging.getLogger(__name__)
+
+# pg_trgm's default pg_trgm.word_similarity_threshold, which the
+# trigram_word_similar lookup (the %> operator) filters on
+TRIGRAM_THRESHOLD = 0.6
+# Rows fetched per requested suggestion; extra rows leave room for turfs
+# that share a location, which collapse into one location suggestion.
+ROWS_PER_SUGGESTION = 3
+
+
+def _database_rows(q, limit):
+    """Substring matches in one query, prefix matches ranked first."""
+    return (
+        Turf.objects.filter(Q(name__icontains=q) | Q(location__icontains=q))
+        .annotate(
+            name_rank=Case(
+                When(name__istartswith=q, then=Value(2)),
+                When(name__icontains=q, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+            location_rank=Case(
+                When(location__istartswith=q, then=Value(2)),
+                When(location__icontains=q, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+        )
+        .order_by("-name_rank", "-location_rank", "name", "id")
+        .values("id", "name", "location", "name_rank", "location_rank")[:limit * ROWS_PER_SUGGESTION]
+    )
+
+
+def _trigram_rows(q, limit):
+    """
+    Fuzzy matches ranked by pg_trgm word similarity, served by the GIN
+    trigram indexes on name and location. Needs the pg_trgm extension.
+    """
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    rows = (
+        Turf.objects.filter(Q(name__trigram_word_similar=q) | Q(location__trigram_word_similar=q))
+        .annotate(
+            name_rank=TrigramWordSimilarity(q, "name"),
+            location_rank=Coalesce(TrigramWordSimilarity(q, "location"), Value(0.0)),
+        )
+        .order_by("-name_rank", "-location_rank", "name", "id")
+        .values("id", "name", "location", "name_rank", "location_rank")[:limit * ROWS_PER_SUGGESTION]
+    )
+    for row in rows:
+        for rank in ("name_rank", "location_rank"):
+            if row[rank] < TRIGRAM_THRESHOLD:
+                row[rank] = 0
+        yield row
+
+
+class SuggestIndex(ReloadingIndex):
+    """
+    Per-worker autocomplete index: one sorted array of lowercased tokens
+    (every word of each turf's name and location, plus the whole strings)
+    with compact parallel arrays pointing back at the turf. A query is a
+    bisect to the first token starting with the typed prefix and a scan
+    over the matching run.
+
+    Strings are interned so repeated locations and words are stored once.
+    Rows are (id, name, location).
+    """
+
+    LOCATION = 1  # token comes from the location (else the name)
+    WHOLE = 2  # token is the whole string (else a single word)
+
+    @staticmethod
+    def _words(text):
+        text = text.lower()
+        words = {sys.intern(w) for w in re.findall(r"\w+", text)}
+        words.add(sys.intern(text))
+        return words
+
+    def _keys(self, slot):
+        keys = []
+        for field, text in ((0, self._names[slot]), (self.LOCATION, self._locations[slot])):
+            if not text:
+                continue
+            whole = text.lower()
+            for word in self._words(text):
+                keys.append((word, slot, field | (self.WHOLE if word == whole else 0)))
+        return keys
+
+    def _set_rows(self, rows):
+        self._slots = {}
+        self._ids = array("q")
+        self._names = []
+        self._locations = []
+        keys = []
+        for pk, name, location in rows:
+            keys.extend(self._keys(self._add_slot(pk, name, location)))
+        keys.sort()
+        self._tokens = [key[0] for key in keys]
+        self._token_slots = array("I", (key[1] for key in keys))
+        self._token_kinds = array("B", (key[2] for key in keys))
+
+    def _add_slot(self, pk, name, location):
+        slot = len(self._ids)
+        self._slots[pk] = slot
+        self._ids.append(pk)
+        self._names.append(sys.intern(name) if name else None)
+        self._locations.append(sys.intern(location) if location else None)
+        return slot
+
+    def _remove_keys(self, slot):
+        for token, _, kind in self._keys(slot):
+            i = bisect_left(self._tokens, token)
+            while self._token_slots[i] != slot or self._token_kinds[i] != kind:
+                i += 1
+            del self._tokens[i]
+            del self._token_slots[i]
+            del self._token_kinds[i]
+
+    def _insert_keys(self, slot):
+        for token, _, kind in self._keys(slot):
+            i = bisect_left(self._tokens, token)
+            self._tokens.insert(i, token)
+            self._token_slots.insert(i, slot)
+            self._token_kinds.insert(i, kind)
+
+    def _source_rows(self):
+        return Turf.objects.values_list("id", "name", "location")
+
+    def upsert(self, pk, name, location):
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            slot = self._slots.get(pk)
+            if slot is None:
+                slot = self._add_slot(pk, name, location)
+            else:
+                self._remove_keys(slot)
+                self._names[slot] = sys.intern(name) if name else None
+                self._locations[slot] = sys.intern(location) if location else None
+            self._insert_keys(slot)
+
+    def remove(self, pk):
+        with self._lock:
+            slot = self._slots.pop(pk, None)
+            if slot is None:
+                return
+            self._remove_keys(slot)
+            # The slot stays as a tombstone until the next full rebuild
+            self._names[slot] = self._locations[slot] = None
+
+    def rows(self, q, limit):
+        """Ranked rows in the same shape as the database backends."""
+        self._ensure_loaded()
+        q = q.lower()
+        matches = {}
+        with self._lock:
+            i = bisect_left(self._tokens, q)
+            while i < len(self._tokens) and self._tokens[i].startswith(q):
+                slot, kind = self._token_slots[i], self._token_kinds[i]
+                rank = 2 if kind & self.WHOLE else 1
+                ranks = matches.setdefault(slot, [0, 0])
+                field = 1 if kind & self.LOCATION else 0
+                ranks[field] = max(ranks[field], rank)
+                i += 1
+            rows = [
+                {
+                    "id": self._ids[slot],
+                    "name": self._names[slot],
+                    "location": self._locations[slot],
+                    "name_rank": name_rank,
+                    "location_rank": location_rank,
+                }
+                for slot, (name_rank, location_rank) in matches.items()
+            ]
+        rows.sort(key=lambda r: (-r["name_rank"], -r["location_rank"], r["name"] or "", r["id"]))
+        return rows[:limit * ROWS_PER_SUGGESTION]
+
+
+suggest_index = SuggestIndex(ttl=getattr(settings, "TURF_SUGGEST_INDEX_TTL", 300))
+
+def warm_suggest_index():
+    """Build the in-memory index up front when it is the configured backend."""
+    if getattr(settings, "TURF_SUGGEST_BACKEND", "database") != "memory":
+        return
+    try:
+        suggest_index.load()
+    except DatabaseError:
+        # Leave it to the first query; the worker should still start
+        logger.warning("Could not warm the suggest index", exc_info=True)
+    finally:
+        # Don't carry this connection into forked workers (gunicorn --preload)
+        connections.close_all()
+
+
+BACKENDS = {
+    "database": _database_rows,
+    "trigram": _trigram_rows,
+    "memory": suggest_index.rows,
+}
+
+
+def build_suggestions(rows, limit):
+    """
+    Turn ranked rows (id, name, location, name_rank, location_rank; a rank of
+    0 means that field did not match) into suggestions: turf names matching
+    the query, then turfs whose location matches, then the locations.
+    """
+    rows = list(rows)
+    groups = (
+        [("name", row) for row in sorted(rows, key=lambda r: -r["name_rank"]) if row["name_rank"]]
+        + [("name", row) for row in sorted(rows, key=lambda r: -r["location_rank"]) if row["location_rank"]]
+        + [("location", row) for row in sorted(rows, key=lambda r: -r["location_rank"]) if row["location_rank"]]
+    )
+    seen = set()
+    results = []
+    for kind, row in groups:
+        if len(results) >= limit:
+            break
+        if kind == "name":
+            if row["name"] and row["id"] not in seen:
+                seen.add(row["id"])
+                results.append({"type": "name", "id": row["id"], "text": row["name"]})
+        elif row["location"] and row["location"] not in seen:
+            seen.add(row["location"])
+            results.append({"type": "location", "text": row["location"]})
+    return results
+
+
+def suggest(q, limit, backend=None):
+    backend = backend or getattr(settings, "TURF_SUGGEST_BACKEND", "database")
+    return build_suggestions(BACKENDS[backend](q, limit), limit)
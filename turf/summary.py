@@ -0,0 +1,72 @@
+"""
+Maintenance of the TurfSummary read model.
+
+Rows are rebuilt from the same data TurfListSerializer reads, in batches
+of upserts. turf.signals refreshes a turf's row whenever the turf or its
+images change, bulk writes go through turf.bulk.refresh_derived_data, and
+`manage.py rebuild_turf_summaries` rebuilds the whole table.
+"""
+from django.db.models import F
+
+from .image_urls import image_srcset, image_url
+from .models import Turf, TurfSummary
+
+# Output keys of a summary row, matching TurfListSerializer
+SUMMARY_FIELDS = (
+    "id", "name", "pitch_type", "location", "latitude", "longitude",
+    "image", "image_srcset", "image_placeholder", "image_color", "price",
+)
+UPDATE_FIELDS = [
+    "name", "pitch_type", "location", "latitude", "longitude", "price",
+    "image", "image_srcset", "image_placeholder", "image_color", "refreshed_at",
+]
+
+
+def build_summary(turf):
+    """TurfSummary for a turf loaded with Turf.objects.for_list()."""
+    cover = turf.cover_images[0] if turf.cover_images else None
+    return TurfSummary(
+        turf_id=turf.pk,
+        name=turf.name,
+        pitch_type=turf.pitch_type.name if turf.pitch_type else None,
+        location=turf.location,
+        latitude=turf.latitude,
+        longitude=turf.longitude,
+        price=turf.price_per_hour,
+        image=image_url(cover, "card"),
+        image_srcset=image_srcset(cover),
+        image_placeholder=cover.placeholder if cover else "",
+        image_color=cover.dominant_color if cover else "",
+    )
+
+
+def refresh_summaries(turf_ids=None, batch_size=1000):
+    """Rebuild the summary rows of `turf_ids` (every turf when None); returns how many."""
+    turfs = Turf.objects.for_list().order_by("pk")
+    if turf_ids is not None:
+        turfs = turfs.filter(pk__in=list(turf_ids))
+    refreshed = 0
+    batch = []
+    for turf in turfs.iterator(chunk_size=batch_size):
+        batch.append(build_summary(turf))
+        if len(batch) >= batch_size:
+            refreshed += _upsert(batch)
+            batch = []
+    if batch:
+        refreshed += _upsert(batch)
+    return refreshed
+
+
+def _upsert(summaries):
+    TurfSummary.objects.bulk_create(
+        summaries, update_conflicts=True, unique_fields=["turf"], update_fields=UPDATE_FIELDS
+    )
+    return len(summaries)
+
+
+def summary_rows(ids):
+    """{turf id: summary dict} for the turfs in `ids` that have a summary row."""
+    fields = [field for field in SUMMARY_FIELDS if field != "id"]
+    rows = TurfSummary.objects.filter(pk__in=ids).values(*fields, id=F("turf_id"))
+    # Same key order as TurfListSerializer output
+    return {row["id"]: {field: row[field] for field in SUMMARY_FIELDS} for row in rows}
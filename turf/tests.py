@@ -1,3 +1,345 @@
-from django.test import TestCase
+import json
+import tempfile
+import threading
+import unittest
+from io import BytesIO, StringIO
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.admin.sites import site
+from django.contrib.auth.models import User
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.db import connections
+from cloudinary import CloudinaryResource
+from PIL import Image
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .admin import TurfAdminForm
+from .booking import SLOT_MINUTES, SlotUnavailable, create_booking
+from . import pipeline
+from .bulk import parse_row
+from .geo import TurfLocationIndex, location_index
+from .memory import reset_peak_rss, rss_kb
+from .models import Booking, Facility, PitchType, Purpose, Turf, TurfImage, TurfSummary
+from .schedule import ScheduleError, parse_schedule
+from .summary import refresh_summaries
+
+
+class TurfDeleteTests(TestCase):
+    def test_delete_turf_with_images(self):
+        turf = Turf.objects.create(name="Astro Arena", price_per_hour=100)
+        TurfImage.objects.create(turf=turf, status=TurfImage.FAILED, error="broken")
+        TurfImage.objects.create(turf=turf, status=TurfImage.PENDING)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().delete(f"/api/turfs/{turf.pk}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Turf.objects.filter(pk=turf.pk).exists())
+        self.assertFalse(TurfSummary.objects.filter(turf_id=turf.pk).exists())
+
+    def test_delete_removes_staged_uploads(self):
+        turf = Turf.objects.create(name="Astro Arena", price_per_hour=100)
+        with tempfile.TemporaryDirectory() as staging, \
+                mock.patch.object(pipeline, "staging_storage", FileSystemStorage(location=staging)), \
+                mock.patch("turf.signals.staging_storage", pipeline.staging_storage):
+            with mock.patch.object(pipeline, "submit"), self.captureOnCommitCallbacks(execute=True):
+                image, = pipeline.stage_images(turf, [BytesIO(b"raw upload")])
+            self.assertTrue(pipeline.staging_storage.exists(image.staged_file))
+            with self.captureOnCommitCallbacks(execute=True):
+                turf.delete()
+            self.assertFalse(pipeline.staging_storage.exists(image.staged_file))
+
+    def test_image_change_refreshes_summary(self):
+        turf = Turf.objects.create(name="Astro Arena", price_per_hour=100)
+        TurfSummary.objects.filter(turf=turf).delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            TurfImage.objects.create(turf=turf, status=TurfImage.FAILED)
+        self.assertTrue(TurfSummary.objects.filter(turf=turf).exists())
+
+
+class BookingAdminTests(TestCase):
+    def test_bookings_cannot_be_added_or_moved(self):
+        user = User.objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get("/admin/turf/booking/add/").status_code, 403)
+        booking_admin = site._registry[Booking]
+        self.assertIn("starts_at", booking_admin.readonly_fields)
+        self.assertNotIn("status", booking_admin.readonly_fields)
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    """Hundreds of bookings race for one slot; exactly one may win."""
+    requests = 200
+    concurrency = 20
+
+    def test_one_booking_per_slot(self):
+        turf = Turf.objects.create(name="Load test", price_per_hour=100, game_time="Open daily (24 hours)")
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        starts_at = timezone.make_aware(datetime.combine(tomorrow, datetime.min.time()).replace(hour=10))
+        ends_at = starts_at + timedelta(minutes=SLOT_MINUTES)
+        # Released together so the first wave really does race
+        barrier = threading.Barrier(self.concurrency)
+
+        def attempt(i):
+            if i < self.concurrency:
+                barrier.wait()
+            try:
+                create_booking(turf.pk, starts_at, ends_at, customer_name=f"Player {i}", customer_phone="+233200000000")
+                return "booked"
+            except SlotUnavailable:
+                return "conflict"
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            outcomes = list(executor.map(attempt, range(self.requests)))
+
+        self.assertEqual(outcomes.count("booked"), 1)
+        self.assertEqual(outcomes.count("conflict"), self.requests - 1)
+        self.assertEqual(Booking.objects.confirmed().filter(turf=turf).count(), 1)
+
+
+class NearestPagingTests(SimpleTestCase):
+    def test_pages_through_tied_distances(self):
+        # Several pitches of one complex share its coordinates
+        index = TurfLocationIndex()
+        index.load([(pk, 5.6 if pk % 2 else 5.7, -0.2) for pk in range(1, 201)])
+        seen, after = [], None
+        while True:
+            page = index.nearest(5.6, -0.2, 7, after=after)
+            if not page:
+                break
+            seen.extend(pk for pk, _ in page)
+            after = page[-1][1], page[-1][0]
+        self.assertEqual(seen, list(range(1, 201, 2)) + list(range(2, 201, 2)))
+
+
+class ParseScheduleTests(SimpleTestCase):
+    def days(self, intervals):
+        return {day: (opens, closes) for day, opens, closes in intervals}
+
+    def test_help_text_example(self):
+        hours = self.days(parse_schedule("Open Monday - Friday (6AM - 11PM)\nOpen Saturdays & Sundays (8AM - 11PM)"))
+        self.assertEqual(hours[0], (6 * 60, 23 * 60))
+        self.assertEqual(hours[6], (8 * 60, 23 * 60))
+
+    def test_several_clauses_on_one_line(self):
+        hours = self.days(parse_schedule("Weekends: 7am-9pm; Weekdays: 5pm-11pm"))
+        self.assertEqual(hours[5], (7 * 60, 21 * 60))
+        self.assertEqual(hours[2], (17 * 60, 23 * 60))
+        hours = self.days(parse_schedule("Sunday 2pm - 10pm, Monday-Saturday 6am - 11pm"))
+        self.assertEqual(hours[6], (14 * 60, 22 * 60))
+        self.assertEqual(hours[5], (6 * 60, 23 * 60))
+
+    def test_closed_days(self):
+        hours = self.days(parse_schedule("Open Monday - Saturday (6AM - 11PM)\nClosed on Sundays"))
+        self.assertEqual(sorted(hours), [0, 1, 2, 3, 4, 5])
+        hours = self.days(parse_schedule("Open daily 6am-11pm, closed Saturdays, Sundays"))
+        self.assertEqual(sorted(hours), [0, 1, 2, 3, 4])
+        hours = self.days(parse_schedule("Open Mon-Sat 6am-10pm (closed Sundays)"))
+        self.assertEqual(hours, {day: (6 * 60, 22 * 60) for day in range(6)})
+        hours = self.days(parse_schedule("Mon-Fri 6am-10pm, closed Sat, Sun 2pm-8pm"))
+        self.assertEqual(sorted(hours), [0, 1, 2, 3, 4, 6])
+
+    def test_twelve_midnight_and_noon(self):
+        self.assertEqual(self.days(parse_schedule("Daily 6am - 12 midnight"))[3], (6 * 60, 24 * 60))
+        self.assertEqual(self.days(parse_schedule("Weekdays 8am - 12 noon"))[0], (8 * 60, 12 * 60))
+
+    def test_overnight(self):
+        self.assertEqual(parse_schedule("Saturday 6pm - 2am"), [(5, 18 * 60, 24 * 60), (6, 0, 2 * 60)])
+
+    def test_unreadable(self):
+        with self.assertRaises(ScheduleError):
+            parse_schedule("Mondays")
+        with self.assertRaises(ScheduleError):
+            parse_schedule("Mon-Fri 6am-10pm 8am-9pm Sat")
+        for text in ("Closed on Sundays", "Call for hours"):
+            with self.assertRaises(ScheduleError):
+                parse_schedule(text)
+
+
+class GameTimeValidationTests(TestCase):
+    def test_api_rejects_unreadable_hours(self):
+        client = APIClient()
+        turf = {"name": "Astro Arena", "price_per_hour": 100, "game_time": "Mondays"}
+        response = client.post("/api/turfs/", turf, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("game_time", response.json())
+        response = client.post("/api/turfs/bulk/", [dict(turf, game_time="Daily 6am - 10pm"), turf], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()), ["1"])
+        self.assertFalse(Turf.objects.exists())
+
+    def test_admin_rejects_unreadable_hours(self):
+        form = TurfAdminForm(data={"name": "Astro Arena", "price_per_hour": 100, "game_time": "Mondays"})
+        self.assertIn("No opening times", form.errors["game_time"][0])
+
+    def test_import_row_rejects_unreadable_hours(self):
+        row = {"external_id": "T1", "name": "Astro Arena", "price_per_hour": "100", "game_time": "Mondays"}
+        with self.assertRaises(ScheduleError):
+            parse_row(row)
+        self.assertEqual(parse_row(dict(row, game_time="Mon-Sat 6am-10pm (closed Sundays)"))["game_time"], "Mon-Sat 6am-10pm (closed Sundays)")
+
+
+class ImportExportTests(TestCase):
+    def test_round_trip_without_external_ids(self):
+        turf = Turf.objects.create(name="Astro Arena", price_per_hour=100, game_time="Daily 6am - 11pm")
+        turf.purposes.add(Purpose.objects.create(name="Football"))
+        with tempfile.TemporaryDirectory() as directory:
+            path = f"{directory}/turfs.jsonl"
+            call_command("export_turfs", path, no_progress=True, stderr=StringIO())
+            with open(path) as exported:
+                row = json.loads(exported.read())
+            self.assertEqual((row["id"], row["external_id"]), (turf.pk, None))
+            with open(path, "w") as edited:
+                edited.write(json.dumps(dict(row, name="Astro Arena 2")) + "\n")
+                edited.write(json.dumps(dict(row, id=turf.pk + 1)) + "\n")
+            out, err = StringIO(), StringIO()
+            call_command("import_turfs", path, no_progress=True, stdout=out, stderr=err)
+        self.assertIn("Imported 1 turfs", out.getvalue())
+        self.assertIn(f"line 2: no turf with id {turf.pk + 1}", err.getvalue())
+        turf = Turf.objects.get()
+        self.assertEqual((turf.name, turf.external_id), ("Astro Arena 2", None))
+        self.assertEqual([purpose.name for purpose in turf.purposes.all()], ["Football"])
+
+
+# Any backend shared between processes; the tests run with local memory
+SHARED_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": tempfile.mkdtemp()}
+}
+
+
+class CachedResponseTests(TestCase):
+    def test_cached_with_shared_cache(self):
+        with override_settings(CACHES=SHARED_CACHES):
+            caches["default"].clear()
+            client = APIClient()
+            self.assertEqual(client.get("/api/turfs/")["X-Cache"], "MISS")
+            self.assertEqual(client.get("/api/turfs/")["X-Cache"], "HIT")
+            with self.captureOnCommitCallbacks(execute=True):
+                Turf.objects.create(name="Astro Arena", price_per_hour=100)
+            response = client.get("/api/turfs/")
+            self.assertEqual(response["X-Cache"], "MISS")
+            self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_disabled_with_per_worker_cache(self):
+        # Other workers' LocMemCaches would never see this worker's version bumps
+        client = APIClient()
+        client.get("/api/turfs/")
+        self.assertNotIn("X-Cache", client.get("/api/turfs/"))
+
+
+class ConditionalGetTests(TestCase):
+    def test_not_modified_with_shared_cache(self):
+        with override_settings(CACHES=SHARED_CACHES):
+            caches["default"].clear()
+            client = APIClient()
+            etag = client.get("/api/purposes/")["ETag"]
+            self.assertEqual(client.get("/api/purposes/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_disabled_with_per_worker_cache(self):
+        # Another worker's LocMemCache would never see this worker's version bumps
+        response = APIClient().get("/api/purposes/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+
+
+class QueryCountTests(TestCase):
+    """Query counts must not grow with the number of turfs on a page."""
+
+    @classmethod
+    def setUpTestData(cls):
+        pitch_type = PitchType.objects.create(name="Astro")
+        purposes = [Purpose.objects.create(name=name) for name in ("Football", "Training")]
+        facilities = [Facility.objects.create(name=name) for name in ("Parking", "Showers")]
+        for i in range(30):
+            turf = Turf.objects.create(
+                name=f"Arena {i}", price_per_hour=100 + i, pitch_type=pitch_type,
+                latitude=5.6 + i / 100, longitude=-0.2, game_time="Daily 6am - 10pm",
+            )
+            turf.purposes.set(purposes)
+            turf.facilities.set(facilities)
+            for j in range(2):
+                TurfImage.objects.create(turf=turf, image=CloudinaryResource(f"turfs/{i}-{j}", version="1", format="jpg"))
+        # Image signals refresh summaries on commit, which test data never reaches
+        refresh_summaries()
+
+    def setUp(self):
+        location_index.load()
+        self.client = APIClient()
+
+    def assertQueries(self, queries, url, params=None):
+        # Start from an empty response cache so the view really runs
+        caches["default"].clear()
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list(self):
+        for page_size in (5, 25):
+            response = self.assertQueries(2, "/api/turfs/", {"page_size": page_size})
+            self.assertEqual(len(response.data["results"]), page_size)
+
+    def test_nearest(self):
+        for limit in (5, 25):
+            response = self.assertQueries(1, "/api/turfs/nearest/", {"lat": 5.6, "lon": -0.2, "limit": limit})
+            self.assertEqual(len(response.data["results"]), limit)
+
+    def test_retrieve(self):
+        # Turf, then one prefetch per nested relation, however many rows each holds
+        sparse = Turf.objects.create(name="Bare pitch", price_per_hour=50)
+        for turf in (sparse, Turf.objects.get(name="Arena 0")):
+            self.assertQueries(7, f"/api/turfs/{turf.pk}/")
+
+    def test_suggest(self):
+        for limit in (3, 20):
+            response = self.assertQueries(1, "/api/turfs/suggest/", {"q": "Arena", "limit": limit})
+            self.assertEqual(len(response.data), limit)
+
+
+def _fake_upload(file, **options):
+    file.read()
+    return CloudinaryResource("turfs/uploaded", version="1", format="jpg", type="upload", resource_type="image")
+
+
+class ImageMemoryTests(TransactionTestCase):
+    """Peak memory of processing uploads depends on the pool size, not the number of photos."""
+    concurrency = 2
+    # Per pool thread; a 12MP photo decoded at full size is 36 MB by itself
+    budget_mb = 64
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        try:
+            reset_peak_rss()
+        except OSError:
+            raise unittest.SkipTest("Needs Linux /proc to reset the peak RSS")
+        # A 12MP photo; noise compresses like a real one rather than a flat colour
+        buffer = BytesIO()
+        Image.effect_noise((4000, 3000), 64).convert("RGB").save(buffer, format="JPEG", quality=92)
+        cls.photo = buffer.getvalue()
+
+    def peak_mb(self, count):
+        turf = Turf.objects.create(name="Astro Arena", price_per_hour=100)
+        with tempfile.TemporaryDirectory() as staging, \
+                mock.patch.object(pipeline, "staging_storage", FileSystemStorage(location=staging)), \
+                mock.patch("cloudinary.uploader.upload_resource", _fake_upload):
+            with mock.patch.object(pipeline, "submit"):
+                pipeline.stage_images(turf, [BytesIO(self.photo) for _ in range(count)])
+            reset_peak_rss()
+            base = rss_kb("VmRSS")
+            self.assertEqual(pipeline.process_pending(concurrency=self.concurrency), count)
+            peak = rss_kb("VmHWM") - base
+        self.assertEqual(TurfImage.objects.filter(turf=turf, status=TurfImage.READY).count(), count)
+        return peak / 1024
+
+    def test_peak_rss_is_bounded(self):
+        peak = self.peak_mb(4 * self.concurrency)
+        self.assertLess(peak, self.concurrency * self.budget_mb, f"peak RSS grew by {peak:.0f} MB")
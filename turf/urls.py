@@ -6,8 +6,11 @@ from .views import (
     GameTimeViewSet,
     PurposeViewSet,
     FacilityViewSet,
+    BookingViewSet,
     NearestTurfsView,
+    AvailableTurfsView,
     SuggestTurfsView,
+    CacheStatsView,
 )
 
 router = DefaultRouter()
@@ -16,9 +19,12 @@ router.register(r'pitchtypes', PitchTypeViewSet)
 router.register(r'gametimes', GameTimeViewSet)
 router.register(r'purposes', PurposeViewSet)
 router.register(r'facilities', FacilityViewSet)
+router.register(r'bookings', BookingViewSet)
 
 urlpatterns = [
     path('turfs/nearest/', NearestTurfsView.as_view(), name='nearest-turfs'),
+    path('turfs/available/', AvailableTurfsView.as_view(), name='available-turfs'),
     path('turfs/suggest/', SuggestTurfsView.as_view(), name='suggest-turfs'),
+    path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
     path('', include(router.urls)),
 ]
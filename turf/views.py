@@ -1,56 +1,138 @@
-from rest_framework import viewsets
-from rest_framework.filters import SearchFilter
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Turf, PitchType, GameTime, Purpose, Facility
+from .models import Turf, PitchType, GameTime, Purpose, Facility, OpeningHours, Booking
 from .serializers import (
+    BookingSerializer,
     TurfSerializer,
-    TurfListSerializer,
+    TurfSummarySerializer,
     PitchTypeSerializer,
     GameTimeSerializer,
     PurposeSerializer,
-    FacilitySerializer
+    FacilitySerializer,
+    validate_bulk,
+    validate_bulk_ids,
+    turf_summaries,
 )
-from .filters import TurfFilter
+from .booking import SlotUnavailable, availability
+from .bulk import bulk_create_turfs, bulk_update_turfs
+from .facets import facet_counts
+from .filters import TurfFilter, TurfSearchFilter
 from rest_framework.views import APIView
 from rest_framework.response import Response
-import math
+from .geo import location_index
+from .pagination import TurfCursorPagination, DistanceCursorPagination
+from .suggest import suggest
+from .cache import CachedReadMixin, ConditionalGetMixin, cached_response, get_stats, get_version, get_last_modified
+from .image_urls import get_stats as image_url_stats
+
+NEAREST_DEFAULT_LIMIT = 20
+NEAREST_MAX_LIMIT = 100
+AVAILABILITY_MAX_DAYS = getattr(settings, "TURF_AVAILABILITY_MAX_DAYS", 14)
+
 
+def _location_params(params):
+    """(lat, lon, radius_km or None, limit) from query params; ValueError says what is wrong."""
+    try:
+        lat = float(params.get('lat'))
+        lon = float(params.get('lon'))
+    except (TypeError, ValueError):
+        raise ValueError('lat and lon query parameters are required and must be valid numbers.')
+    radius_km = params.get('radius_km')
+    if radius_km is not None:
+        try:
+            radius_km = float(radius_km)
+        except (TypeError, ValueError):
+            raise ValueError('radius_km must be a valid number.')
+        if radius_km <= 0:
+            raise ValueError('radius_km must be greater than 0.')
+    try:
+        limit = int(params.get('limit', NEAREST_DEFAULT_LIMIT))
+    except (TypeError, ValueError):
+        limit = NEAREST_DEFAULT_LIMIT
+    return lat, lon, radius_km, max(1, min(limit, NEAREST_MAX_LIMIT))
+
+
+def _datetime_param(params, name):
+    try:
+        value = parse_datetime(params.get(name) or '')
+    except ValueError:
+        value = None
+    if value is None:
+        raise ValueError(f'{name} must be an ISO 8601 date and time.')
+    return timezone.make_aware(value) if timezone.is_naive(value) else value
 
-def haversine(lat1, lon1, lat2, lon2):
-    R = 6371  # Earth radius in kilometers
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
-    c = 2*math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
 
 class NearestTurfsView(APIView):
+    cache_collection = "turfs"
+    uncached_params = ("open_now",)
+
+    @cached_response
     def get(self, request):
         try:
-            user_lat = float(request.query_params.get('lat'))
-            user_lon = float(request.query_params.get('lon'))
-        except (TypeError, ValueError):
-            return Response({'error': 'lat and lon query parameters are required and must be valid numbers.'}, status=400)
-        turfs = Turf.objects.all()
-        turfs_with_distance = []
-        for turf in turfs:
-            if turf.latitude is not None and turf.longitude is not None:
-                distance = haversine(user_lat, user_lon, turf.latitude, turf.longitude)
-                turfs_with_distance.append({
-                    'turf': turf,
-                    'distance': distance
-                })
-        turfs_with_distance.sort(key=lambda x: x['distance'])
-        data = [
-            dict(TurfListSerializer(t['turf']).data, distance=t['distance'])
-            for t in turfs_with_distance
-        ]
-        return Response(data)
+            user_lat, user_lon, radius_km, limit = _location_params(request.query_params)
+            open_at = None
+            if request.query_params.get('open_at') is not None:
+                open_at = _datetime_param(request.query_params, 'open_at')
+            elif request.query_params.get('open_now', '').lower() in ('true', '1'):
+                open_at = timezone.now()
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
+        include = None
+        if open_at is not None:
+            include = set(OpeningHours.objects.open_at(open_at).values_list('turf_id', flat=True))
+        paginator = DistanceCursorPagination()
+        after = paginator.decode_cursor(request)
+        turfs_with_distance = location_index.nearest(user_lat, user_lon, limit, radius_km, after, include)
+        distances = dict(turfs_with_distance)
+        data = [dict(row, distance=distances[row["id"]]) for row in turf_summaries(list(distances))]
+        return paginator.get_paginated_response(request, turfs_with_distance, limit, data)
+
+
+class AvailableTurfsView(APIView):
+    """
+    Turfs within radius_km of lat/lon, narrowed by the TurfFilter
+    parameters, that are open and unbooked for the whole of
+    starts_at..ends_at; nearest first. One query finds the free turfs
+    (TurfFilter, then Turf.objects.free_between) and the location index
+    ranks them. Not cached: bookings change the answer without touching
+    any turf.
+    """
+
+    def get(self, request):
+        try:
+            user_lat, user_lon, radius_km, limit = _location_params(request.query_params)
+            starts_at = _datetime_param(request.query_params, 'starts_at')
+            ends_at = _datetime_param(request.query_params, 'ends_at')
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
+        if ends_at <= starts_at:
+            return Response({'error': 'ends_at must be after starts_at.'}, status=400)
+        if ends_at - starts_at > timedelta(days=AVAILABILITY_MAX_DAYS):
+            return Response({'error': f'At most {AVAILABILITY_MAX_DAYS} days at a time.'}, status=400)
+        filterset = TurfFilter(request.query_params, queryset=Turf.objects.all(), request=request)
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=400)
+        # TurfFilter applies radius_km itself, with lat/lon
+        include = set(filterset.qs.order_by().free_between(starts_at, ends_at).values_list('pk', flat=True))
+        paginator = DistanceCursorPagination()
+        after = paginator.decode_cursor(request)
+        turfs_with_distance = location_index.nearest(user_lat, user_lon, limit, radius_km, after, include)
+        distances = dict(turfs_with_distance)
+        data = [dict(row, distance=distances[row["id"]]) for row in turf_summaries(list(distances))]
+        return paginator.get_paginated_response(request, turfs_with_distance, limit, data)
 
 
 class SuggestTurfsView(APIView):
+    cache_collection = "turfs"
+
+    @cached_response
     def get(self, request):
         q = (request.query_params.get('q') or '').strip()
         if not q:
@@ -59,64 +141,145 @@ class SuggestTurfsView(APIView):
             limit = int(request.query_params.get('limit', 8))
         except (TypeError, ValueError):
             limit = 8
-        names = list(Turf.objects.filter(name__icontains=q).values('id', 'name').distinct()[:limit])
-        locations_qs = Turf.objects.filter(location__icontains=q)
-        locations = list(locations_qs.values_list('location', flat=True).distinct()[:limit])
-        names_from_location = list(locations_qs.values('id', 'name').distinct()[:limit])
-        seen = set()
-        results = []
-        for n in names:
-            nid, ntext = n.get('id'), n.get('name')
-            if ntext and nid and nid not in seen:
-                seen.add(nid)
-                results.append({"type": "name", "id": nid, "text": ntext})
-            if len(results) >= limit:
-                break
-        if len(results) < limit:
-            for n in names_from_location:
-                nid, ntext = n.get('id'), n.get('name')
-                if ntext and nid and nid not in seen:
-                    seen.add(nid)
-                    results.append({"type": "name", "id": nid, "text": ntext})
-                if len(results) >= limit:
-                    break
-        if len(results) < limit:
-            for loc in locations:
-                if loc and loc not in seen:
-                    seen.add(loc)
-                    results.append({"type": "location", "text": loc})
-                if len(results) >= limit:
-                    break
-        return Response(results)
-
-
-class TurfViewSet(viewsets.ModelViewSet):
+        return Response(suggest(q, limit))
+
+
+class CacheStatsView(APIView):
+    def get(self, request):
+        return Response({**get_stats(), "image_urls": image_url_stats()})
+
+
+class TurfViewSet(ConditionalGetMixin, CachedReadMixin, viewsets.ModelViewSet):
+    cache_collection = "turfs"
+    uncached_params = ("open_now",)
     queryset = Turf.objects.all()
     serializer_class = TurfSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filter_backends = [DjangoFilterBackend, TurfSearchFilter]
     filterset_class = TurfFilter
-    search_fields = ["name", "location"]
+    pagination_class = TurfCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            # Only ids and ordering columns are needed; cards come from TurfSummary
+            return queryset.defer("search_vector")
+        if self.action in ("retrieve", "update", "partial_update"):
+            return queryset.for_detail()
+        return queryset
+
+    def get_validators(self, request, *args, **kwargs):
+        if self.action != "retrieve":
+            return super().get_validators(request, *args, **kwargs)
+        try:
+            updated_at = Turf.objects.filter(pk=kwargs["pk"]).values_list("updated_at", flat=True).first()
+        except (TypeError, ValueError):
+            updated_at = None
+        if updated_at is None:
+            return None, None
+        # Nested lookup names can change without touching the turf itself
+        etag = f"turf-{kwargs['pk']}-{updated_at.timestamp()}-{get_version('lookups')}"
+        return etag, max(int(updated_at.timestamp()), get_last_modified("lookups"))
+
     def get_serializer_class(self):
         if self.action == "list":
-            return TurfListSerializer
+            return TurfSummarySerializer
         return TurfSerializer
 
+    @action(detail=False, methods=["post", "patch", "delete"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Create (POST a list of turfs), update (PATCH a list of partial turfs
+        with their "id") or delete (DELETE a list of ids) up to
+        TURF_BULK_MAX_ITEMS turfs in one transaction. Nothing is written
+        unless every item is valid; errors are keyed by item index.
+        """
+        if request.method == "DELETE":
+            ids = validate_bulk_ids(request.data)
+            with transaction.atomic():
+                Turf.objects.filter(pk__in=ids).delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        if request.method == "PATCH":
+            turfs = bulk_update_turfs(validate_bulk(request.data, partial=True))
+            response_status = status.HTTP_200_OK
+        else:
+            turfs = bulk_create_turfs(validate_bulk(request.data))
+            response_status = status.HTTP_201_CREATED
+        by_id = Turf.objects.for_detail().in_bulk([turf.pk for turf in turfs])
+        serializer = TurfSerializer([by_id[turf.pk] for turf in turfs], many=True, context=self.get_serializer_context())
+        return Response(serializer.data, status=response_status)
+
+
+    @action(detail=False, methods=["get"])
+    @cached_response
+    def facets(self, request):
+        """
+        Turf counts per pitch type, purpose, facility and price bucket
+        (TURF_PRICE_BUCKETS) for the list's filter and search parameters,
+        in one query.
+        """
+        return Response(facet_counts(self.filter_queryset(self.get_queryset())))
+
+    @action(detail=True, methods=["get"])
+    def availability(self, request, pk=None):
+        """
+        Free slots between the `start` and `end` dates (YYYY-MM-DD, both
+        inclusive, in the site's time zone; default today), at most
+        TURF_AVAILABILITY_MAX_DAYS days. Never cached: bookings change it.
+        """
+        today = timezone.localdate()
+        try:
+            start = parse_date(request.query_params.get('start') or today.isoformat())
+            end = parse_date(request.query_params.get('end') or start.isoformat())
+        except (AttributeError, ValueError):
+            start = end = None
+        if start is None or end is None:
+            return Response({'error': 'start and end must be dates (YYYY-MM-DD).'}, status=400)
+        if end < start:
+            return Response({'error': 'end must not be before start.'}, status=400)
+        if (end - start).days >= AVAILABILITY_MAX_DAYS:
+            return Response({'error': f'At most {AVAILABILITY_MAX_DAYS} days at a time.'}, status=400)
+        if not Turf.objects.filter(pk=pk).exists():
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        slots = availability(
+            pk,
+            timezone.make_aware(datetime.combine(start, time.min)),
+            timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)),
+        )
+        return Response([{'starts_at': starts_at, 'ends_at': ends_at} for starts_at, ends_at in slots])
+
+
+class BookingViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Book a slot (POST), or look a booking up by its reference."""
+    queryset = Booking.objects.select_related("turf")
+    serializer_class = BookingSerializer
+    lookup_field = "reference"
+
+    def create(self, request, *args, **kwargs):
+        try:
+            return super().create(request, *args, **kwargs)
+        except SlotUnavailable as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
+
 
-class PitchTypeViewSet(viewsets.ModelViewSet):
+class PitchTypeViewSet(ConditionalGetMixin, CachedReadMixin, viewsets.ModelViewSet):
+    cache_collection = "pitchtypes"
     queryset = PitchType.objects.all()
     serializer_class = PitchTypeSerializer
 
 
-class GameTimeViewSet(viewsets.ModelViewSet):
+class GameTimeViewSet(ConditionalGetMixin, CachedReadMixin, viewsets.ModelViewSet):
+    cache_collection = "gametimes"
     queryset = GameTime.objects.all()
     serializer_class = GameTimeSerializer
 
 
-class PurposeViewSet(viewsets.ModelViewSet):
+class PurposeViewSet(ConditionalGetMixin, CachedReadMixin, viewsets.ModelViewSet):
+    cache_collection = "purposes"
     queryset = Purpose.objects.all()
     serializer_class = PurposeSerializer
 
 
-class FacilityViewSet(viewsets.ModelViewSet):
+class FacilityViewSet(ConditionalGetMixin, CachedReadMixin, viewsets.ModelViewSet):
+    cache_collection = "facilities"
     queryset = Facility.objects.all()
     serializer_class = FacilitySerializer
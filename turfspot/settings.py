@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'cloudinary',
     'cloudinary_storage',
@@ -134,6 +136,25 @@ REST_FRAMEWORK = {
     ]
 }
 
+# Cache used for API responses. It must be shared by every gunicorn worker
+# and management command, so all of them see the same entries and version
+# bumps: by default a table in the main database (created by the turf
+# migrations), or point CACHE_BACKEND/CACHE_LOCATION at e.g.
+# django.core.cache.backends.redis.RedisCache + redis://host:6379/0.
+# With a per-process backend (local memory, which the tests use) responses
+# are not cached and conditional GETs are not answered.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'turf_cache'),
+    }
+}
+if sys.argv[1:2] == ['test']:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'turfspot'}}
+
+# Seconds a cached API response is kept (entries are also invalidated on writes)
+TURF_CACHE_TIMEOUT = int(os.getenv('TURF_CACHE_TIMEOUT', '300'))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -191,6 +212,18 @@ CLOUDINARY_STORAGE = {
 
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
+# Local directory where API photo uploads wait for background processing
+# (see turf.pipeline; drain leftovers with `manage.py process_images`)
+TURF_IMAGE_STAGING_ROOT = os.getenv('TURF_IMAGE_STAGING_ROOT', os.path.join(BASE_DIR, 'staging'))
+# Images compressed/uploaded at once per worker process
+TURF_IMAGE_CONCURRENCY = int(os.getenv('TURF_IMAGE_CONCURRENCY', '4'))
+# Photos with more pixels than this are rejected before being decoded
+TURF_IMAGE_MAX_PIXELS = int(os.getenv('TURF_IMAGE_MAX_PIXELS', '60000000'))
+
+# Uploads larger than this are spooled to a temporary file instead of being
+# held in worker memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('FILE_UPLOAD_MAX_MEMORY_SIZE', str(256 * 1024)))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -200,3 +233,34 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Google Maps API key for custom admin map widget (load from environment)
 GOOGLE_MAPS_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY', '')
+
+# Seconds between full reloads of each worker's in-memory nearest-turf index
+# (rows are also patched immediately on Turf save/delete)
+TURF_GEO_INDEX_TTL = int(os.getenv('TURF_GEO_INDEX_TTL', '300'))
+
+# Autocomplete backend for /api/turfs/suggest/: "database" (ranked ILIKE),
+# "trigram" (pg_trgm similarity; needs the pg_trgm extension) or "memory"
+# (per-worker prefix index, warmed in wsgi.py)
+TURF_SUGGEST_BACKEND = os.getenv('TURF_SUGGEST_BACKEND', 'database')
+# Seconds between full rebuilds of the in-memory autocomplete index
+TURF_SUGGEST_INDEX_TTL = int(os.getenv('TURF_SUGGEST_INDEX_TTL', '300'))
+
+# Cloudinary URLs memoized per worker by turf.image_urls.build_url
+TURF_IMAGE_URL_CACHE_SIZE = int(os.getenv('TURF_IMAGE_URL_CACHE_SIZE', '4096'))
+
+# Country calling code given to local phone numbers (leading 0) when they
+# are normalized to E.164; 233 is Ghana
+TURF_PHONE_COUNTRY_CODE = os.getenv('TURF_PHONE_COUNTRY_CODE', '233')
+
+# Most turfs accepted by one request to /api/turfs/bulk/
+TURF_BULK_MAX_ITEMS = int(os.getenv('TURF_BULK_MAX_ITEMS', '100'))
+
+# Length of a bookable slot in minutes; slots start on this grid from
+# midnight, so it should divide a day (e.g. 30, 60, 90, 120)
+TURF_SLOT_MINUTES = int(os.getenv('TURF_SLOT_MINUTES', '60'))
+# Most days /api/turfs/<id>/availability/ returns at once
+TURF_AVAILABILITY_MAX_DAYS = int(os.getenv('TURF_AVAILABILITY_MAX_DAYS', '14'))
+
+# Upper bounds of the price-per-hour buckets counted by /api/turfs/facets/
+# (the last bucket is everything from the highest bound up)
+TURF_PRICE_BUCKETS = os.getenv('TURF_PRICE_BUCKETS', '100,200,300,500')
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'turfspot.settings')
 
 application = get_wsgi_application()
+
+# Build per-worker in-memory indexes before the first request
+from turf.suggest import warm_suggest_index  # noqa: E402
+
+warm_suggest_index()